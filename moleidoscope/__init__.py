@@ -1,6 +1,12 @@
-from .visualize import show
 from .animate import animate
 from .linker import Linker
 from .polyhedra import Polyhedra
 from .line import Line
 from .mirror import Mirror
+
+
+# Viewer backend (nglview) is imported on first use
+def show(*args, **kwargs):
+    """ Show given structures using nglview (see visualize.show) """
+    from .visualize import show
+    return show(*args, **kwargs)
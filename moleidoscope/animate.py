@@ -2,18 +2,24 @@
 # Date: August 2017
 """
 Animation of molecules
+Keyframe interpolation and trajectory output only need numpy, viewer backends (nglview / mdtraj)
+are imported when a widget is created (animate / show_frames).
 """
 import os
-import mdtraj
-import nglview
+import io
 import tempfile
+import numpy as np
 from .output import write_pdb
+from .geo.vector import kabsch
+from .geo.quaternion import QuaternionArray
 
 
 def animate(frames, gui=False, delete=True,):
     """
     Creates nglview widget for given list of molecule files (frames).
     """
+    import mdtraj
+    import nglview
     T = mdtraj.load(frames, top=frames[0])
     view = nglview.show_mdtraj(T, gui=gui)
     view.add_ball_and_stick()
@@ -27,11 +33,191 @@ def rotate(molecule, angle=2, axis=[1, 0, 0], n_frames=100, temp_dir=None):
     """
     Rotate molecules in given axis, angle increment and number of steps.
     """
-    angle = np.deg2rad(angle)
     frames = []
-    for frame in range(1, n_frames + 1):
-        mol = molecule.rotate(angle * frame, axis)
+    for coors in rotation_frames(molecule, angle=angle, axis=axis, n_frames=n_frames):
         temp_pdb_file = tempfile.NamedTemporaryFile(mode='w+', suffix='.pdb', delete=False)
-        write_pdb(temp_pdb_file, mol.atom_names, mol.atom_coors)
+        write_pdb(temp_pdb_file, molecule.atom_names, coors)
         frames.append(temp_pdb_file.name)
     return frames
+
+
+def rotation_frames(molecule, angle=2, axis=[1, 0, 0], n_frames=100):
+    """
+    Yield coordinates (N, 3) of molecule rotated in given axis with given angle increment (degrees).
+    """
+    coors = np.array(molecule.atom_coors, dtype=float)
+    step = QuaternionArray.from_axis_angle(axis, np.deg2rad(angle))
+    q = step
+    for frame in range(n_frames):
+        yield q.rotate(coors)[0]
+        q = step * q
+
+
+def _segment(coors_1, coors_2, blocks):
+    """
+    Rigid body motion of each block between two keyframes.
+    Returns start centers, center displacements, block rotations (QuaternionArray)
+    and residual (non-rigid) displacements of each atom.
+    """
+    centers_1 = np.array([coors_1[s:e].mean(axis=0) for s, e in blocks])
+    centers_2 = np.array([coors_2[s:e].mean(axis=0) for s, e in blocks])
+    matrices = np.array([kabsch(coors_1[s:e], coors_2[s:e]) for s, e in blocks])
+    rotations = QuaternionArray.from_matrix(matrices)
+    atom_block = np.concatenate([[b] * (e - s) for b, (s, e) in enumerate(blocks)])
+    rigid = np.einsum('nij,nj->ni', matrices[atom_block], coors_1 - centers_1[atom_block]) + centers_2[atom_block]
+    return centers_1, centers_2 - centers_1, rotations, coors_2 - rigid, atom_block
+
+
+def _blend(coors_1, segment, t):
+    """ Interpolated coordinates between two keyframes for t in [0, 1] """
+    centers, displacement, rotations, residual, atom_block = segment
+    matrices = QuaternionArray.identity(len(rotations)).slerp(rotations, t).matrix()
+    coors = np.einsum('nij,nj->ni', matrices[atom_block], coors_1 - centers[atom_block])
+    return coors + (centers + t * displacement)[atom_block] + t * residual
+
+
+def _keyframe_blocks(keyframe, blocks):
+    """ Keyframe coordinates as array and blocks (whole structure if None) """
+    coors = np.array(keyframe.atom_coors if hasattr(keyframe, 'atom_coors') else keyframe, dtype=float)
+    if blocks is None:
+        blocks = [(0, len(coors))]
+    return coors, blocks
+
+
+def interpolate(keyframes, n_frames=10, blocks=None):
+    """
+    Yield interpolated coordinates (N, 3) between consecutive keyframes.
+    Each block of atoms moves as a rigid body: rotation is interpolated with quaternion slerp
+    and block center linearly (any non-rigid difference is blended linearly).
+        - keyframes: iterable of coordinate arrays or molecules (same atoms in each keyframe)
+        - n_frames: number of frames between two keyframes
+        - blocks: list of (start, end) atom ranges that move rigidly (ex: Polyhedra.get_blocks())
+    Keyframes are consumed one at a time so memory does not depend on the number of frames.
+    """
+    previous = None
+    for keyframe in keyframes:
+        coors, blocks = _keyframe_blocks(keyframe, blocks)
+        if previous is not None:
+            segment = _segment(previous, coors, blocks)
+            for frame in range(n_frames):
+                yield _blend(previous, segment, frame / n_frames)
+        previous = coors
+    if previous is not None:
+        yield previous
+
+
+class Interpolator:
+    """
+    Random access interpolation between keyframes (see interpolate).
+    Only keyframes are stored, frames are computed when requested.
+
+    Example usage::
+      >>> frames = Interpolator(list(relax_keyframes(poly)), n_frames=20, blocks=poly.get_blocks())
+      >>> len(frames) -> 221
+      >>> frames[10] -> (N, 3) coordinates
+    """
+    def __init__(self, keyframes, n_frames=10, blocks=None):
+        self.keyframes = []
+        for keyframe in keyframes:
+            coors, blocks = _keyframe_blocks(keyframe, blocks)
+            self.keyframes.append(coors)
+        self.n_frames = n_frames
+        self.blocks = blocks
+        self.segments = [_segment(c1, c2, blocks) for c1, c2 in zip(self.keyframes[:-1], self.keyframes[1:])]
+
+    def __repr__(self):
+        return "<Interpolator object with %i keyframes and %i frames>" % (len(self.keyframes), len(self))
+
+    def __len__(self):
+        return (len(self.keyframes) - 1) * self.n_frames + 1
+
+    def __getitem__(self, index):
+        return self.frame(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.frame(index)
+
+    def frame(self, index):
+        """ Returns coordinates (N, 3) of given frame """
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError('Frame index out of range')
+        segment_index, frame = divmod(index, self.n_frames)
+        if segment_index == len(self.segments):
+            return self.keyframes[-1]
+        return _blend(self.keyframes[segment_index], self.segments[segment_index], frame / self.n_frames)
+
+
+def relax_keyframes(polyhedra, angle=15, scan_limit=180):
+    """
+    Yield coordinates of polyhedra for each edge rotation angle scanned in Polyhedra.relax_edges
+    (starting from the unrotated structure).
+    """
+    yield np.array(polyhedra.atom_coors, dtype=float)
+    for i in range(1, int(scan_limit / angle)):
+        new_poly = polyhedra.copy()
+        for edge in range(len(new_poly.edges)):
+            new_poly.rotate_edge(edge, np.deg2rad(i * angle))
+        yield np.array(new_poly.atom_coors, dtype=float)
+
+
+def build_keyframes(polyhedra):
+    """
+    Yield coordinates of a built polyhedra as linkers are placed on the edges one at a time.
+    Linkers that are not placed yet are shown at the position of the original linker.
+    """
+    blocks = polyhedra.get_blocks()
+    final = np.array(polyhedra.atom_coors, dtype=float)
+    linker = np.array(polyhedra.linker.atom_coors, dtype=float)
+    coors = final.copy()
+    for start, end in blocks[:len(polyhedra.edge_linkers)]:
+        coors[start:end] = linker
+    yield coors.copy()
+    for start, end in blocks[:len(polyhedra.edge_linkers)]:
+        coors[start:end] = final[start:end]
+        yield coors.copy()
+
+
+def write_trajectory(frames, atom_names, file_path, header='frame'):
+    """ Write frames (iterable of (N, 3) coordinates) to a multi-frame xyz file one frame at a time """
+    with open(file_path, 'w') as traj_file:
+        for index, coors in enumerate(frames):
+            traj_file.write('%i\n%s %i\n' % (len(atom_names), header, index))
+            traj_file.write(''.join(['%s %.4f %.4f %.4f\n' % (name, x, y, z) for name, (x, y, z) in zip(atom_names, coors)]))
+    return file_path
+
+
+class FrameTrajectory:
+    """
+    nglview adaptor that computes frames of an Interpolator on demand
+    (combined with nglview Trajectory / Structure in show_frames)
+    """
+    def __init__(self, frames, atom_names):
+        self.frames = frames
+        self.atom_names = atom_names
+        self.ext = 'pdb'
+        self.params = {}
+        self.id = str(id(self))
+
+    def get_structure_string(self):
+        pdb_string = io.StringIO()
+        write_pdb(pdb_string, self.atom_names, self.frames[0])
+        return pdb_string.getvalue()
+
+    def get_coordinates(self, index):
+        return np.asarray(self.frames[index], dtype=np.float32)
+
+    @property
+    def n_frames(self):
+        return len(self.frames)
+
+
+def show_frames(frames, atom_names, gui=False):
+    """ Creates nglview widget for Interpolator frames without writing files """
+    import nglview
+    trajectory = type('FrameTrajectory', (FrameTrajectory, nglview.Trajectory, nglview.Structure), {})
+    view = nglview.NGLWidget(trajectory(frames, atom_names), gui=gui)
+    view.add_ball_and_stick()
+    return view
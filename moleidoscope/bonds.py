@@ -0,0 +1,118 @@
+# Date: October 2026
+# Author: Kutay B. Sezginel
+"""
+Bond perception with covalent radii and compressed (CSR) bond graph
+"""
+import numpy as np
+from moleidoscope.geo.grid import SpatialHash
+
+
+# Covalent radii (Angstrom) from Cordero et al. Dalton Trans. 2008
+covalent_radii = {'H': 0.31, 'B': 0.84, 'C': 0.76, 'N': 0.71, 'O': 0.66, 'F': 0.57, 'Si': 1.11, 'P': 1.07,
+                  'S': 1.05, 'Cl': 1.02, 'Br': 1.20, 'I': 1.39, 'Se': 1.20, 'As': 1.19, 'Li': 1.28, 'Na': 1.66,
+                  'K': 2.03, 'Mg': 1.41, 'Ca': 1.76, 'Al': 1.21, 'Ti': 1.60, 'V': 1.53, 'Cr': 1.39, 'Mn': 1.39,
+                  'Fe': 1.32, 'Co': 1.26, 'Ni': 1.24, 'Cu': 1.32, 'Zn': 1.22, 'Ga': 1.22, 'Ge': 1.20, 'Zr': 1.75,
+                  'Ru': 1.46, 'Rh': 1.42, 'Pd': 1.39, 'Ag': 1.45, 'Cd': 1.44, 'Sn': 1.39, 'Pt': 1.36, 'Au': 1.36,
+                  'Hg': 1.32}
+default_radius = 1.5    # Used for atom names that are not in covalent_radii
+
+
+def atom_radii(atom_names):
+    """ Covalent radius of each atom """
+    return np.array([covalent_radii.get(name.capitalize(), default_radius) for name in atom_names], dtype=float)
+
+
+def perceive_bonds(atom_names, atom_coors, tolerance=0.45, min_dist=0.4):
+    """
+    Find bonded atom pairs (i < j) with distance between min_dist and sum of covalent radii + tolerance.
+    Neighbor search uses a spatial hash grid so cost scales linearly with number of atoms.
+    """
+    coors = np.asarray(atom_coors, dtype=float).reshape(-1, 3)
+    radii = atom_radii(atom_names)
+    if len(coors) < 2:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    cutoff = 2 * radii.max() + tolerance
+    i, j, dist = SpatialHash(coors, cell_size=cutoff).pairs(cutoff)
+    bonded = (dist <= radii[i] + radii[j] + tolerance) & (dist >= min_dist)
+    return i[bonded], j[bonded]
+
+
+def perceive_contacts(names_1, coors_1, names_2, coors_2, tolerance=0.45, min_dist=0.4):
+    """ Find bonded atom pairs between two groups of atoms (ex: linkers and metals), returns (i, j) for each group """
+    coors_1 = np.asarray(coors_1, dtype=float).reshape(-1, 3)
+    coors_2 = np.asarray(coors_2, dtype=float).reshape(-1, 3)
+    if len(coors_1) == 0 or len(coors_2) == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    radii_1, radii_2 = atom_radii(names_1), atom_radii(names_2)
+    cutoff = radii_1.max() + radii_2.max() + tolerance
+    j, i, dist = SpatialHash(coors_1, cell_size=cutoff).neighbors(coors_2, cutoff)
+    bonded = (dist <= radii_1[i] + radii_2[j] + tolerance) & (dist >= min_dist)
+    return i[bonded], j[bonded]
+
+
+class BondGraph:
+    """
+    Undirected bond graph in compressed sparse row format: neighbors of atom a are indices[indptr[a]:indptr[a + 1]].
+
+    Example usage::
+      >>> bonds = BondGraph.perceive(linker.atom_names, linker.atom_coors)
+      >>> bonds.neighbors(0) -> array([1, 5, 6])
+      >>> i, j = bonds.pairs()
+    """
+    def __init__(self, n_atoms, i=(), j=()):
+        i, j = np.asarray(i, dtype=int), np.asarray(j, dtype=int)
+        rows, cols = np.concatenate([i, j]), np.concatenate([j, i])
+        order = np.lexsort((cols, rows))
+        self.n_atoms = n_atoms
+        self.indices = cols[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_atoms))])
+
+    @classmethod
+    def perceive(cls, atom_names, atom_coors, tolerance=0.45):
+        """ Bond graph from covalent radii (see perceive_bonds) """
+        return cls(len(atom_names), *perceive_bonds(atom_names, atom_coors, tolerance=tolerance))
+
+    @classmethod
+    def concatenate(cls, graphs, extra=None, n_atoms=None):
+        """
+        Combine bond graphs of molecules in given order, extra bonds (i, j) use combined atom indices
+            - n_atoms: total number of atoms if atoms without a graph follow (ex: metals)
+        """
+        offsets = np.cumsum([0] + [g.n_atoms for g in graphs])
+        pairs = [g.pairs() for g in graphs]
+        i = [p[0] + o for p, o in zip(pairs, offsets)]
+        j = [p[1] + o for p, o in zip(pairs, offsets)]
+        if extra is not None:
+            i.append(np.asarray(extra[0], dtype=int))
+            j.append(np.asarray(extra[1], dtype=int))
+        n_atoms = int(offsets[-1]) if n_atoms is None else n_atoms
+        return cls(n_atoms, np.concatenate(i), np.concatenate(j))
+
+    def __repr__(self):
+        return "<BondGraph object with %i atoms and %i bonds>" % (self.n_atoms, len(self))
+
+    def __len__(self):
+        return len(self.indices) // 2
+
+    def neighbors(self, atom):
+        """ Indices of atoms bonded to given atom """
+        return self.indices[self.indptr[atom]:self.indptr[atom + 1]]
+
+    def degree(self):
+        """ Number of bonds of each atom """
+        return np.diff(self.indptr)
+
+    def pairs(self):
+        """ Bonded atom pairs (i < j) """
+        rows = np.repeat(np.arange(self.n_atoms), self.degree())
+        upper = rows < self.indices
+        return rows[upper], self.indices[upper]
+
+    def remove(self, atom_indices):
+        """ Return bond graph without given atoms (remaining atoms are renumbered in order) """
+        keep = np.ones(self.n_atoms, dtype=bool)
+        keep[list(atom_indices)] = False
+        new_index = np.cumsum(keep) - 1
+        i, j = self.pairs()
+        kept = keep[i] & keep[j]
+        return BondGraph(int(keep.sum()), new_index[i[kept]], new_index[j[kept]])
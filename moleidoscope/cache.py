@@ -0,0 +1,195 @@
+# Date: October 2026
+# Author: Kutay B. Sezginel
+"""
+Content addressed energy cache (in-memory LRU + optional sqlite tier)
+"""
+import time
+import sqlite3
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+
+def fingerprint(atom_names, atom_coors, ff_selection='uff', decimals=4, mode=None):
+    """
+    Hash rounded coordinates, atom names and force field selection of a structure.
+        - decimals: number of decimals coordinates are rounded to before hashing
+        - mode: energy calculation mode (ex: symmetry tolerance, precision) so that approximate
+                energies are not returned for exact calculations
+    """
+    coors = np.round(np.asarray(atom_coors, dtype=float), decimals) + 0.0   # + 0.0 removes negative zeros
+    sha = hashlib.sha1()
+    sha.update(str(ff_selection).encode())
+    sha.update(str(mode).encode())
+    sha.update(' '.join(atom_names).encode())
+    sha.update(np.ascontiguousarray(coors).tobytes())
+    return sha.hexdigest()
+
+
+class EnergyCache:
+    """
+    Energy cache with an in-memory LRU tier and an optional on-disk sqlite tier.
+        - size: maximum number of energies kept in memory
+        - path: sqlite file path for the disk tier (None -> memory only)
+        - disk_size: maximum number of energies kept on disk (least recently used are evicted in batches)
+        - decimals: number of decimals coordinates are rounded to for the fingerprint
+        - commit_every: number of disk writes committed together (see flush)
+        - commit_interval: maximum time (seconds) pending disk writes wait before a commit
+
+    Example usage::
+      >>> cache = EnergyCache(size=1000, path='energy.db')
+      >>> poly.get_energy(cache=cache)
+      >>> cache.stats() -> {'hits': 0, 'misses': 1, ...}
+      >>> with EnergyCache(path='energy.db') as cache:     # Pending writes are committed on exit
+      ...     poly.relax_edges(cache=cache)
+    """
+    def __init__(self, size=10000, path=None, disk_size=1000000, decimals=4, commit_every=100, commit_interval=5):
+        self.size = size
+        self.path = path
+        self.disk_size = disk_size
+        self.decimals = decimals
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.committed = time.time()
+        self.evict_batch = disk_size // 100   # Extra entries evicted at once (1% of disk size)
+        self.pending = 0
+        self.memory = OrderedDict()
+        self.hits = dict(memory=0, disk=0)
+        self.misses = 0
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            self.db.execute('CREATE TABLE IF NOT EXISTS energy '
+                            '(key TEXT PRIMARY KEY, energy REAL, accessed INTEGER)')
+            self.db.execute('CREATE INDEX IF NOT EXISTS energy_accessed ON energy (accessed)')
+            self.db.commit()
+            self.clock = self.db.execute('SELECT COALESCE(MAX(accessed), 0) FROM energy').fetchone()[0]
+            self.n_rows = self.db.execute('SELECT COUNT(*) FROM energy').fetchone()[0]
+
+    def __repr__(self):
+        return "<EnergyCache object memory:%i disk:%s hit rate:%.2f>" % (len(self.memory), self.path, self.hit_rate())
+
+    def __len__(self):
+        return len(self.memory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def key(self, molecule, mode=None):
+        """ Fingerprint of a molecule with atom names, atom coordinates, force field parameters and calculation mode """
+        ff_selection = molecule.ff['type'] if hasattr(molecule, 'ff') else None
+        return fingerprint(molecule.atom_names, molecule.atom_coors, ff_selection, decimals=self.decimals, mode=mode)
+
+    def get(self, key):
+        """ Return cached energy for given key (None if not cached) """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.hits['memory'] += 1
+            return self.memory[key]
+        if self.db is not None:
+            row = self.db.execute('SELECT energy FROM energy WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                self._touch(key)
+                self._remember(key, row[0])
+                self.hits['disk'] += 1
+                return row[0]
+        self.misses += 1
+        return None
+
+    def set(self, key, energy):
+        """ Store energy for given key in memory and disk tiers """
+        self._remember(key, energy)
+        if self.db is not None:
+            self.clock += 1
+            cursor = self.db.execute('INSERT OR IGNORE INTO energy VALUES (?, ?, ?)', (key, float(energy), self.clock))
+            if cursor.rowcount == 1:
+                self.n_rows += 1
+            else:
+                self.db.execute('UPDATE energy SET energy = ?, accessed = ? WHERE key = ?', (float(energy), self.clock, key))
+            if self.n_rows > self.disk_size:
+                # Evict a batch of least recently used entries so that eviction does not run for every insert
+                n_evict = min(self.n_rows - self.disk_size + self.evict_batch, self.n_rows)
+                cursor = self.db.execute('DELETE FROM energy WHERE key IN '
+                                         '(SELECT key FROM energy ORDER BY accessed LIMIT ?)', (n_evict,))
+                self.n_rows -= cursor.rowcount
+            self._written()
+
+    def energy(self, molecule, calculate, mode=None):
+        """
+        Return cached energy of molecule or calculate it with given function and cache the result
+            - mode: energy calculation mode, energies are cached separately for each mode
+        """
+        key = self.key(molecule, mode=mode)
+        energy = self.get(key)
+        if energy is None:
+            energy = calculate()
+            self.set(key, energy)
+        return energy
+
+    def _remember(self, key, energy):
+        """ Add energy to memory tier and evict least recently used entries """
+        self.memory[key] = energy
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.size:
+            self.memory.popitem(last=False)
+
+    def _touch(self, key):
+        """ Update access time of a disk entry """
+        self.clock += 1
+        self.db.execute('UPDATE energy SET accessed = ? WHERE key = ?', (self.clock, key))
+        self._written()
+
+    def _written(self):
+        """ Count a disk write and commit once commit_every writes are pending or commit_interval has passed """
+        self.pending += 1
+        if self.pending >= self.commit_every or time.time() - self.committed >= self.commit_interval:
+            self.flush()
+
+    def flush(self):
+        """ Commit pending disk writes (other processes see entries only after a commit) """
+        if self.db is not None and self.pending > 0:
+            self.db.commit()
+            self.pending = 0
+        self.committed = time.time()
+
+    def hit_rate(self):
+        """ Fraction of lookups served from cache """
+        hits = self.hits['memory'] + self.hits['disk']
+        total = hits + self.misses
+        return hits / total if total > 0 else 0.0
+
+    def stats(self):
+        """ Return cache statistics as dictionary """
+        return dict(hits=self.hits['memory'] + self.hits['disk'],
+                    memory_hits=self.hits['memory'],
+                    disk_hits=self.hits['disk'],
+                    misses=self.misses,
+                    hit_rate=self.hit_rate(),
+                    memory_entries=len(self.memory),
+                    disk_entries=self.disk_entries())
+
+    def disk_entries(self):
+        """ Number of energies stored on disk """
+        if self.db is None:
+            return 0
+        return self.n_rows
+
+    def clear(self, disk=False):
+        """ Clear memory tier (and disk tier if disk=True) and reset statistics """
+        self.memory.clear()
+        self.hits = dict(memory=0, disk=0)
+        self.misses = 0
+        if disk and self.db is not None:
+            self.db.execute('DELETE FROM energy')
+            self.db.commit()
+            self.n_rows, self.pending = 0, 0
+
+    def close(self):
+        """ Close disk tier connection """
+        if self.db is not None:
+            self.flush()
+            self.db.close()
+            self.db = None
@@ -0,0 +1,105 @@
+# Date: October 2026
+# Author: Kutay B. Sezginel
+"""
+Cavity volume, largest included sphere and window size analysis for polyhedra
+"""
+import numpy as np
+from scipy import ndimage
+from scipy.spatial import cKDTree, Delaunay
+
+
+def free_distance(points, tree, radii, k=8, cutoff=np.inf):
+    """
+    Distance from each point to the closest atom surface (distance to atom center - atom radius).
+    Nearest k atom centers are checked only for points where the nearest atom is not the largest one.
+        - cutoff: points with no atom center within cutoff get infinite free distance (faster search)
+    """
+    dist, index = tree.query(points, k=1, distance_upper_bound=cutoff, workers=-1)
+    found = np.isfinite(dist)
+    free = np.full(len(points), np.inf)
+    free[found] = dist[found] - radii[index[found]]
+    k = min(k, len(radii))
+    refine = np.where(found)[0][radii[index[found]] < radii.max()]
+    if k > 1 and len(refine) > 0:
+        dist, index = tree.query(points[refine], k=k, workers=-1)
+        free[refine] = np.min(dist - radii[index], axis=1)
+    return free
+
+
+def largest_free(points, coarse, tree, radii):
+    """
+    Index and free distance of the point with the largest free distance.
+    Coarse points are searched first; since free distance changes at most as much as the distance
+    between two points, only points that can exceed the best coarse point are searched again.
+    """
+    coarse_free = free_distance(points[coarse], tree, radii)
+    dist, nearest = cKDTree(points[coarse]).query(points, k=1, workers=-1)
+    candidates = np.where(coarse_free[nearest] + dist >= coarse_free.max())[0]
+    candidate_free = free_distance(points[candidates], tree, radii)
+    best = int(np.argmax(candidate_free))
+    return candidates[best], candidate_free[best]
+
+
+def face_points(corners, spacing):
+    """ Grid points covering a planar polygon (fan triangulation from its centroid) """
+    corners = np.array(corners, dtype=float)
+    center = corners.mean(axis=0)
+    points = [center]
+    for c1, c2 in zip(corners, np.roll(corners, -1, axis=0)):
+        n = max(int(np.ceil(max(np.linalg.norm(c1 - center), np.linalg.norm(c2 - center)) / spacing)), 1)
+        u, v = np.meshgrid(np.arange(n + 1), np.arange(n + 1))
+        mask = u + v <= n
+        u, v = u[mask] / n, v[mask] / n
+        points.append(center + u[:, None] * (c1 - center) + v[:, None] * (c2 - center))
+    return np.vstack(points)
+
+
+def analyze(polyhedra, spacing=0.5, probe=0.0, radius_scale=0.5, stride=4):
+    """
+    Analyze cavity of a built polyhedra (requires force field parameters, see Polyhedra.get_force_field).
+        - spacing: probe grid spacing (Angstrom)
+        - probe: probe radius (Angstrom), grid points closer than this to an atom surface are not void
+        - radius_scale: atom radius as a fraction of force field sigma
+        - stride: coarse grid stride used to search the largest included sphere
+    Returns dictionary with:
+        - volume: cavity volume (Angstrom^3) connected to the largest included sphere
+        - sphere_diameter: diameter of largest sphere inside the polyhedra that does not overlap atoms
+        - sphere_center: center of the largest included sphere
+        - window_diameters: largest circular aperture in each polyhedra face
+    """
+    coors = np.array(polyhedra.atom_coors, dtype=float)
+    radii = np.array(polyhedra.ff['sigma'], dtype=float) * radius_scale
+    vertices = np.array(polyhedra.vertices, dtype=float)
+    if np.linalg.matrix_rank(vertices - vertices.mean(axis=0), tol=1E-6) < 3:
+        raise ValueError('Cavity analysis requires a three dimensional polyhedra')
+    tree = cKDTree(coors)
+
+    # Probe grid inside the polyhedra
+    low, high = vertices.min(axis=0), vertices.max(axis=0)
+    axes = [np.arange(l, h + spacing, spacing) for l, h in zip(low, high)]
+    grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1)
+    shape = grid.shape[:3]
+    inside = np.where(Delaunay(vertices).find_simplex(grid.reshape(-1, 3)) >= 0)[0]
+    points = grid.reshape(-1, 3)[inside]
+    coarse = np.where(np.all(np.indices(shape).reshape(3, -1).T[inside] % stride == 0, axis=1))[0]
+
+    # Void points: only atoms within a short distance are searched, farther points are void
+    free = free_distance(points, tree, radii, cutoff=radii.max() + probe + spacing)
+    void = np.zeros(np.prod(shape), dtype=bool)
+    void[inside] = free > probe
+
+    # Largest included sphere and void region connected to its center
+    center_index, center_free = largest_free(points, coarse, tree, radii)
+    labels, n_labels = ndimage.label(void.reshape(shape))
+    center_label = labels.reshape(-1)[inside[center_index]]
+    volume = np.sum(labels == center_label) * spacing ** 3 if center_label > 0 else 0.0
+
+    windows = []
+    for face in polyhedra.faces:
+        samples = face_points(vertices[face], spacing)
+        windows.append(2 * max(float(np.max(free_distance(samples, tree, radii))), 0.0))
+
+    return dict(volume=float(volume),
+                sphere_diameter=2 * max(float(center_free), 0.0),
+                sphere_center=points[center_index],
+                window_diameters=windows)
@@ -0,0 +1,195 @@
+# Date: October 2026
+# Author: Kutay B. Sezginel
+"""
+Geometric deduplication of linkers and polyhedra (rotation invariant fingerprints + Kabsch RMSD)
+"""
+from collections import Counter
+import numpy as np
+from scipy.spatial.distance import pdist, cdist
+from scipy.optimize import linear_sum_assignment
+from moleidoscope.geo.vector import kabsch
+from moleidoscope.symmetry import _frame
+
+
+def fingerprint(atom_names, atom_coors, bin_width=0.2, r_max=60):
+    """
+    Rotation invariant fingerprint of a structure:
+        - formula: element composition string (ex: 'C6H4N2')
+        - rg: radius of gyration
+        - histogram: cumulative interatomic distance histogram (normalized by number of pairs)
+    """
+    coors = np.array(atom_coors, dtype=float)
+    elements = Counter(atom_names)
+    formula = ''.join(['%s%i' % (e, elements[e]) for e in sorted(elements)])
+    rg = float(np.sqrt(np.mean(np.sum((coors - coors.mean(axis=0)) ** 2, axis=1))))
+    bins = np.arange(0, r_max + bin_width, bin_width)
+    histogram = np.histogram(pdist(coors), bins=bins)[0].astype(float)
+    histogram = np.cumsum(histogram) / max(histogram.sum(), 1)
+    return dict(formula=formula, rg=rg, histogram=histogram)
+
+
+def canonical_order(atom_names, atom_coors):
+    """ Atom order sorted by element and distance from center (independent of input atom order) """
+    coors = np.array(atom_coors, dtype=float)
+    dist = np.round(np.linalg.norm(coors - coors.mean(axis=0), axis=1), 3)
+    return np.lexsort((dist, np.array(atom_names)))
+
+
+def rmsd(coors_1, coors_2):
+    """ Root mean square deviation after Kabsch superposition (same atom order) """
+    c1 = np.array(coors_1, dtype=float)
+    c2 = np.array(coors_2, dtype=float)
+    c1 = c1 - c1.mean(axis=0)
+    c2 = c2 - c2.mean(axis=0)
+    rotated = np.dot(c1, kabsch(c1, c2).T)
+    return float(np.sqrt(np.mean(np.sum((rotated - c2) ** 2, axis=1))))
+
+
+def _assign(names_1, rotated, names_2, coors_2):
+    """ Match atoms of each element by minimum distance assignment, returns atom index in structure 2 for each atom """
+    match = np.arange(len(rotated))
+    for element in np.unique(names_1):
+        idx_1, idx_2 = np.where(names_1 == element)[0], np.where(names_2 == element)[0]
+        rows, cols = linear_sum_assignment(cdist(rotated[idx_1], coors_2[idx_2]))
+        match[idx_1[rows]] = idx_2[cols]
+    return match
+
+
+def reference_rotations(names_1, coors_1, names_2, coors_2, tol=0.5):
+    """
+    Candidate rotations superimposing centered structure 1 onto centered structure 2 (independent of atom order).
+    Two reference atoms of the rarest element in structure 1 (farthest from center and most perpendicular to it)
+    are mapped onto every pair of atoms of structure 2 with the same elements, distances from center and angle.
+    """
+    counts = Counter(names_1)
+    element = min(counts, key=lambda e: (counts[e], e))
+    norms_1, norms_2 = np.linalg.norm(coors_1, axis=1), np.linalg.norm(coors_2, axis=1)
+    candidates_1 = np.where(names_1 == element)[0]
+    a = candidates_1[np.argmax(norms_1[candidates_1])]
+    if norms_1[a] < tol:
+        candidates_1 = np.arange(len(coors_1))
+        a = int(np.argmax(norms_1))
+    cross = np.linalg.norm(np.cross(coors_1[a], coors_1), axis=1)
+    b = candidates_1[np.argmax(cross[candidates_1])]
+    if cross[b] < tol:
+        b = int(np.argmax(cross))
+    if cross[b] < tol:
+        return []       # Linear structure
+    ref_frame = _frame(coors_1[a], coors_1[b])
+    dot = np.dot(coors_1[a], coors_1[b])
+    rotations = []
+    for a2 in np.where((names_2 == names_1[a]) & (np.abs(norms_2 - norms_1[a]) <= tol))[0]:
+        dots = np.dot(coors_2, coors_2[a2])
+        for b2 in np.where((names_2 == names_1[b]) & (np.abs(norms_2 - norms_1[b]) <= tol) &
+                           (np.abs(dots - dot) <= tol * (norms_1[a] + norms_1[b])))[0]:
+            if np.linalg.norm(np.cross(coors_2[a2], coors_2[b2])) > tol:
+                rotations.append(np.dot(_frame(coors_2[a2], coors_2[b2]), ref_frame.T))
+    return rotations
+
+
+def matched_rmsd(names_1, coors_1, names_2, coors_2, n_iter=3, tol=0.5, target=0.0):
+    """
+    RMSD without assuming atom order. Superposition starts from the given order and from each rotation
+    that maps two reference atoms onto equivalent atoms (see reference_rotations), so symmetric structures
+    with many equivalent atoms are matched too. Atoms of the same element are matched by minimum distance
+    assignment and structures are superimposed again with the new matching (n_iter times).
+    Returns lowest RMSD found (search stops once it is not larger than target).
+    """
+    names_1, names_2 = np.array(names_1), np.array(names_2)
+    c1 = np.array(coors_1, dtype=float) - np.mean(coors_1, axis=0)
+    c2 = np.array(coors_2, dtype=float) - np.mean(coors_2, axis=0)
+    starts = [kabsch(c1, c2)] + reference_rotations(names_1, c1, names_2, c2, tol=tol)
+    best = np.inf
+    for rotation in starts:
+        for i in range(n_iter):
+            match = _assign(names_1, np.dot(c1, rotation.T), names_2, c2)
+            rotation = kabsch(c1, c2[match])
+        best = min(best, rmsd(c1, c2[match]))
+        if best <= target:
+            break
+    return best
+
+
+class DuplicateIndex:
+    """
+    Hash index of structures to find geometric duplicates.
+    Structures are bucketed by composition and radius of gyration; only structures in the same
+    (or neighbouring) bucket with similar distance histograms are compared with Kabsch RMSD.
+        - rmsd: maximum RMSD (Angstrom) for two structures to be duplicates
+        - rg_tol: radius of gyration bucket width (Angstrom)
+        - hist_tol: maximum difference between cumulative distance histograms
+        - max_match: largest structure (number of atoms) for order independent matching
+        - bin_width, r_max: distance histogram bins (Angstrom)
+
+    Example usage::
+      >>> index = DuplicateIndex(rmsd=0.1)
+      >>> unique_linkers = index.unique([Linker(i) for i in range(1, 100)])
+      >>> index.stats() -> {'structures': 99, 'unique': 71, 'rmsd_checks': 40, ...}
+    """
+    def __init__(self, rmsd=0.1, rg_tol=0.1, hist_tol=0.1, bin_width=0.2, r_max=60, max_match=500):
+        self.rmsd = rmsd
+        self.max_match = max_match
+        self.rg_tol = rg_tol
+        self.hist_tol = hist_tol
+        self.bin_width = bin_width
+        self.r_max = r_max
+        self.buckets = {}
+        self.structures = []
+        self.duplicates = {}
+        self.n_added = 0
+        self.n_rmsd = 0
+
+    def __repr__(self):
+        return "<DuplicateIndex object with %i unique structures>" % len(self.structures)
+
+    def __len__(self):
+        return len(self.structures)
+
+    def add(self, molecule):
+        """
+        Add structure to index (any object with atom_names and atom_coors).
+        Returns index of the matching unique structure if it is a duplicate, None otherwise.
+        """
+        self.n_added += 1
+        names, coors = list(molecule.atom_names), np.array(molecule.atom_coors, dtype=float)
+        fp = fingerprint(names, coors, bin_width=self.bin_width, r_max=self.r_max)
+        rg_key = int(round(fp['rg'] / self.rg_tol))
+        for key in [(fp['formula'], rg_key + i) for i in (0, -1, 1)]:
+            for unique_index in self.buckets.get(key, []):
+                if self._match(names, coors, fp, self.structures[unique_index]):
+                    self.duplicates.setdefault(unique_index, []).append(self.n_added - 1)
+                    return unique_index
+        order = canonical_order(names, coors)
+        self.structures.append(dict(molecule=molecule, names=names, coors=coors, fp=fp, order=order))
+        self.buckets.setdefault((fp['formula'], rg_key), []).append(len(self.structures) - 1)
+        return None
+
+    def _match(self, names, coors, fp, other):
+        """ Compare fingerprints and confirm with RMSD (given and canonical atom order) """
+        if abs(fp['rg'] - other['fp']['rg']) > self.rg_tol:
+            return False
+        if np.max(np.abs(fp['histogram'] - other['fp']['histogram'])) > self.hist_tol:
+            return False
+        self.n_rmsd += 1
+        if names == other['names'] and rmsd(coors, other['coors']) <= self.rmsd:
+            return True
+        order = canonical_order(names, coors)
+        names_1, coors_1 = [names[i] for i in order], coors[order]
+        names_2, coors_2 = [other['names'][i] for i in other['order']], other['coors'][other['order']]
+        if names_1 != names_2:
+            return False
+        if rmsd(coors_1, coors_2) <= self.rmsd:
+            return True
+        if len(names) > self.max_match:
+            return False
+        return matched_rmsd(names_1, coors_1, names_2, coors_2, target=self.rmsd) <= self.rmsd
+
+    def unique(self, molecules):
+        """ Add structures to index and return the ones that are not duplicates """
+        return [mol for mol in molecules if self.add(mol) is None]
+
+    def stats(self):
+        """ Return index statistics as dictionary """
+        return dict(structures=self.n_added, unique=len(self.structures),
+                    duplicates=self.n_added - len(self.structures),
+                    buckets=len(self.buckets), rmsd_checks=self.n_rmsd)
@@ -0,0 +1,139 @@
+# Date: October 2026
+# Author: Kutay B. Sezginel
+"""
+Linker descriptor index for HostDesigner library (connection vector, length, size, composition)
+"""
+import sqlite3
+from collections import Counter
+import numpy as np
+
+
+def linker_descriptors(library):
+    """
+    Calculate descriptors for each linker in a HostDesigner library (see hd.read_library):
+        - index:    Linker index (starts from 1 as in Linker(linker_index=...))
+        - name:     Linker name
+        - n_atoms:  Number of atoms
+        - length:   Distance between connection atoms (None if connectivity is missing)
+        - vector:   Connection vector (from first to second connection atom)
+        - radius:   Bounding radius (max distance of an atom from the linker center)
+        - elements: Element counts as dictionary
+    """
+    descriptors = []
+    for i, (name, names, coors, connectivity) in enumerate(zip(library['linker_names'], library['atom_names'],
+                                                               library['atom_coors'], library['connectivity']), start=1):
+        coors = np.array(coors, dtype=float)
+        center = coors.mean(axis=0)
+        if connectivity['coors'] is not None:
+            vector = np.array(connectivity['coors'][1]) - np.array(connectivity['coors'][0])
+            length = float(connectivity['dummy_dist'])
+        else:
+            vector, length = None, None
+        descriptors.append(dict(index=i, name=name, n_atoms=len(names), length=length, vector=vector,
+                                radius=float(np.max(np.linalg.norm(coors - center, axis=1))),
+                                elements=dict(Counter(names))))
+    return descriptors
+
+
+def formula(elements):
+    """ Formula string from element counts dictionary (ex: {'C': 6, 'H': 4} -> 'C6H4') """
+    return ''.join(['%s%i' % (e, elements[e]) for e in sorted(elements)])
+
+
+def write_index(descriptors, db_path):
+    """ Write linker descriptors to an indexed sqlite table """
+    db = sqlite3.connect(db_path)
+    db.execute('DROP TABLE IF EXISTS linkers')
+    db.execute('DROP TABLE IF EXISTS elements')
+    db.execute('CREATE TABLE linkers (idx INTEGER PRIMARY KEY, name TEXT, n_atoms INTEGER, length REAL, '
+               'radius REAL, vx REAL, vy REAL, vz REAL, formula TEXT)')
+    db.execute('CREATE TABLE elements (idx INTEGER, element TEXT, count INTEGER)')
+    rows, element_rows = [], []
+    for d in descriptors:
+        vx, vy, vz = d['vector'] if d['vector'] is not None else (None, None, None)
+        rows.append((d['index'], d['name'], d['n_atoms'], d['length'], d['radius'], vx, vy, vz, formula(d['elements'])))
+        element_rows += [(d['index'], e, n) for e, n in d['elements'].items()]
+    db.executemany('INSERT INTO linkers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    db.executemany('INSERT INTO elements VALUES (?, ?, ?)', element_rows)
+    for column in ['length', 'n_atoms', 'radius']:
+        db.execute('CREATE INDEX linkers_%s ON linkers (%s)' % (column, column))
+    db.execute('CREATE INDEX elements_element ON elements (element, count)')
+    db.commit()
+    db.close()
+    return db_path
+
+
+def build_index(db_path, library=None):
+    """ Calculate descriptors for all linkers in the library (default: HostDesigner library) and write index """
+    if library is None:
+        from moleidoscope.linker import get_library
+        library = get_library()
+    return write_index(linker_descriptors(library), db_path)
+
+
+class LinkerIndex:
+    """
+    Linker descriptor index loaded from sqlite into numpy columns for fast filtering.
+
+    Example usage::
+      >>> build_index('linkers.db')
+      >>> index = LinkerIndex('linkers.db')
+      >>> index.query(length=(5, 6), max_atoms=30) -> [12, 57, ...] (linker indices)
+      >>> Linker(linker_index=12)
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        db = sqlite3.connect(db_path)
+        rows = db.execute('SELECT idx, name, n_atoms, length, radius, vx, vy, vz, formula FROM linkers ORDER BY idx').fetchall()
+        element_rows = db.execute('SELECT idx, element, count FROM elements').fetchall()
+        db.close()
+        self.index = np.array([r[0] for r in rows], dtype=int)
+        self.names = [r[1] for r in rows]
+        self.n_atoms = np.array([r[2] for r in rows], dtype=int)
+        self.length = np.array([np.nan if r[3] is None else r[3] for r in rows], dtype=float)
+        self.radius = np.array([r[4] for r in rows], dtype=float)
+        self.vector = np.array([[np.nan if v is None else v for v in r[5:8]] for r in rows], dtype=float).reshape(-1, 3)
+        self.formula = [r[8] for r in rows]
+        position = {idx: i for i, idx in enumerate(self.index)}
+        self.elements = {}
+        for idx, element, count in element_rows:
+            if element not in self.elements:
+                self.elements[element] = np.zeros(len(self.index), dtype=int)
+            self.elements[element][position[idx]] = count
+
+    def __repr__(self):
+        return "<LinkerIndex object with %i linkers>" % len(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def query(self, length=None, max_atoms=None, max_radius=None, elements=None):
+        """
+        Select linkers with given descriptor limits and return their indices
+            - length: (min, max) connection length window (Angstrom)
+            - max_atoms: maximum number of atoms
+            - max_radius: maximum bounding radius (Angstrom)
+            - elements: maximum number of atoms for given elements (ex: {'N': 0} excludes nitrogen)
+        """
+        mask = np.ones(len(self.index), dtype=bool)
+        if length is not None:
+            mask &= (self.length >= length[0]) & (self.length <= length[1])
+        if max_atoms is not None:
+            mask &= self.n_atoms <= max_atoms
+        if max_radius is not None:
+            mask &= self.radius <= max_radius
+        if elements is not None:
+            for element, count in elements.items():
+                if element in self.elements:
+                    mask &= self.elements[element] <= count
+        return self.index[mask].tolist()
+
+    def descriptor(self, linker_index):
+        """ Return descriptors of given linker as dictionary (KeyError if linker is not in the index) """
+        i = int(np.searchsorted(self.index, linker_index))
+        if i == len(self.index) or self.index[i] != linker_index:
+            raise KeyError('Linker %s not in index' % linker_index)
+        return dict(index=int(self.index[i]), name=self.names[i], n_atoms=int(self.n_atoms[i]),
+                    length=float(self.length[i]), radius=float(self.radius[i]),
+                    vector=self.vector[i], formula=self.formula[i],
+                    elements={e: int(c[i]) for e, c in self.elements.items() if c[i] > 0})
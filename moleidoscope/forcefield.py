@@ -5,7 +5,7 @@ Force Field parameters and calculations
 """
 import os
 import math
-import xlrd
+import time
 import numpy as np
 
 
@@ -16,6 +16,7 @@ def read_ff_parameters(excel_file_path=ff_par, ff_selection='uff'):
     """
     Read force field parameters from an excel file according to force field selection
     """
+    import xlrd     # Only needed to read parameter tables
     # Read Excel File
     force_field_data = xlrd.open_workbook(excel_file_path)
     # Read columns to acquire force field parameters
@@ -57,3 +58,148 @@ def lennard_jones(r, sig, eps):
     Energy unit: (kB)
     """
     return 4 * eps * ((sig / r)**12 - (sig / r)**6)
+
+
+def lj_pairs(coors, sigma, epsilon, i, j, min_dist=1E-5):
+    """ Calculate Lennard-Jones energy of each given atom pair (i, j index arrays) """
+    coors, sigma, epsilon = np.asarray(coors, dtype=float), np.asarray(sigma), np.asarray(epsilon)
+    dist = np.maximum(np.linalg.norm(coors[j] - coors[i], axis=1), min_dist)
+    sr6 = ((sigma[i] + sigma[j]) / 2 / dist) ** 6
+    return 4 * np.sqrt(epsilon[i] * epsilon[j]) * (sr6 * sr6 - sr6)
+
+
+def lj_block(coors_1, sigma_1, epsilon_1, coors_2, sigma_2, epsilon_2, min_dist=1E-5, per_atom=False):
+    """
+    Calculate total Lennard-Jones energy between two blocks of atoms (all cross pairs).
+    Coordinates are (N, 3) arrays and force field parameters are (N,) arrays for each block.
+        - per_atom: also return energy of each atom in both blocks (half of each pair energy)
+    """
+    coors_1, coors_2 = np.asarray(coors_1, dtype=float), np.asarray(coors_2, dtype=float)
+    dist = np.linalg.norm(coors_1[:, None, :] - coors_2[None, :, :], axis=2)
+    dist = np.maximum(dist, min_dist)
+    sig_mix = (np.asarray(sigma_1)[:, None] + np.asarray(sigma_2)[None, :]) / 2
+    eps_mix = np.sqrt(np.asarray(epsilon_1)[:, None] * np.asarray(epsilon_2)[None, :])
+    sr6 = (sig_mix / dist) ** 6
+    energy = 4 * eps_mix * (sr6 * sr6 - sr6)
+    if per_atom:
+        return float(np.sum(energy)), np.sum(energy, axis=1) / 2, np.sum(energy, axis=0) / 2
+    return float(np.sum(energy))
+
+
+def lj_self(coors, sigma, epsilon, min_dist=1E-5, per_atom=False):
+    """
+    Calculate total Lennard-Jones energy within a block of atoms (unique pairs i < j).
+        - per_atom: also return energy of each atom (half of each pair energy)
+    """
+    coors = np.asarray(coors, dtype=float)
+    i_1, i_2 = np.triu_indices(len(coors), k=1)
+    dist = np.linalg.norm(coors[i_2] - coors[i_1], axis=1)
+    dist = np.maximum(dist, min_dist)
+    sigma, epsilon = np.asarray(sigma), np.asarray(epsilon)
+    sig_mix = (sigma[i_1] + sigma[i_2]) / 2
+    eps_mix = np.sqrt(epsilon[i_1] * epsilon[i_2])
+    sr6 = (sig_mix / dist) ** 6
+    energy = 4 * eps_mix * (sr6 * sr6 - sr6)
+    if per_atom:
+        atom_energies = (np.bincount(i_1, energy, len(coors)) + np.bincount(i_2, energy, len(coors))) / 2
+        return float(np.sum(energy)), atom_energies
+    return float(np.sum(energy))
+
+
+def lj_batch(coors, sigma, epsilon, pairs=None, min_dist=1E-5, memory=2E8):
+    """
+    Calculate total Lennard-Jones energy of many configurations of the same atoms.
+        - coors: (K, N, 3) coordinates of K configurations
+        - sigma, epsilon: (N,) force field parameters
+        - pairs: (i, j) atom index arrays of pairs to include (default: all pairs i < j)
+        - memory: approximate memory limit (bytes) for intermediate arrays
+    Returns (K,) array of energies.
+    """
+    coors = np.asarray(coors, dtype=float)
+    sigma, epsilon = np.asarray(sigma), np.asarray(epsilon)
+    if pairs is None:
+        pairs = np.triu_indices(coors.shape[1], k=1)
+    i_1, i_2 = pairs
+    sig_mix = (sigma[i_1] + sigma[i_2]) / 2
+    eps_mix = np.sqrt(epsilon[i_1] * epsilon[i_2])
+    chunk = max(1, int(memory / (max(len(i_1), 1) * 8 * 5)))
+    energies = np.empty(len(coors))
+    for start in range(0, len(coors), chunk):
+        c = coors[start:start + chunk]
+        dist = np.linalg.norm(c[:, i_2] - c[:, i_1], axis=2)
+        dist = np.maximum(dist, min_dist)
+        sr6 = (sig_mix / dist) ** 6
+        energies[start:start + chunk] = np.sum(4 * eps_mix * (sr6 * sr6 - sr6), axis=1)
+    return energies
+
+
+def tile_size(memory=2E8, precision='double'):
+    """ Largest number of atoms per tile so that intermediate arrays of a tile pair fit in memory (bytes) """
+    itemsize = 4 if precision == 'single' else 8
+    return max(1, int(math.sqrt(memory / (itemsize * 8))))
+
+
+def lj_tiled(coors, sigma, epsilon, tile=None, memory=2E8, precision='double', min_dist=1E-5):
+    """
+    Calculate total Lennard-Jones energy of all unique atom pairs (i < j) in square tiles of atoms,
+    memory use depends on the tile size and not on the number of atoms.
+        - tile: number of atoms per tile (default: largest tile within memory, see tile_size)
+        - memory: approximate memory limit (bytes) for intermediate arrays
+        - precision: 'double' or 'single' (pair energies in float32, summed in float64)
+    In single precision atoms closer than ~sigma / 1600 overflow to infinite energy.
+    """
+    dtype = np.float32 if precision == 'single' else np.float64
+    coors = np.asarray(coors, dtype=dtype).reshape(-1, 3)
+    sigma = np.asarray(sigma, dtype=dtype)
+    eps_sqrt = np.sqrt(np.asarray(epsilon, dtype=float)).astype(dtype)
+    tile = tile_size(memory, precision) if tile is None else tile
+    min_dist2 = dtype(min_dist ** 2)
+    energy = 0.0
+    for s1 in range(0, len(coors), tile):
+        c1, sig1, eps1 = coors[s1:s1 + tile], sigma[s1:s1 + tile], eps_sqrt[s1:s1 + tile]
+        for s2 in range(s1, len(coors), tile):
+            c2, sig2, eps2 = coors[s2:s2 + tile], sigma[s2:s2 + tile], eps_sqrt[s2:s2 + tile]
+            dist2 = np.zeros((len(c1), len(c2)), dtype=dtype)
+            for axis in range(3):
+                dist2 += (c1[:, axis, None] - c2[None, :, axis]) ** 2
+            np.maximum(dist2, min_dist2, out=dist2)
+            if s1 == s2:
+                dist2[np.tril_indices(len(c1))] = np.inf     # Only pairs i < j (zero energy, no overflow)
+            sr6 = ((sig1[:, None] + sig2[None, :]) / 2) ** 2 / dist2
+            sr6 = sr6 * sr6 * sr6
+            pair_energy = 4 * (eps1[:, None] * eps2[None, :]) * (sr6 * sr6 - sr6)
+            energy += float(np.sum(pair_energy, dtype=np.float64))
+    return energy
+
+
+def validate_tiled(molecule, tiles=(64, 256, 1024), precisions=('double', 'single'), reference=None, repeat=3, verbose=False):
+    """
+    Compare tiled energy calculation (see lj_tiled) against the reference calculation for a molecule
+    with force field parameters (ex: Polyhedra after get_force_field).
+        - reference: reference energy, 'loop' for the pure python molecule.get_energy() (slow for large structures)
+                     (default: lj_tiled in double precision with the default tile size)
+        - repeat: number of timed runs for each setting (fastest run is reported)
+    Returns list of dictionaries with precision, tile, energy, error, relative error and pairs per second.
+    """
+    if reference is None:
+        reference = lj_tiled(molecule.atom_coors, molecule.ff['sigma'], molecule.ff['epsilon'], precision='double')
+    elif reference == 'loop':
+        reference = molecule.get_energy()
+    n_atoms = len(molecule.atom_coors)
+    n_pairs = n_atoms * (n_atoms - 1) / 2
+    results = []
+    for precision in precisions:
+        for tile in tiles:
+            timings = []
+            for r in range(repeat):
+                start = time.perf_counter()
+                energy = lj_tiled(molecule.atom_coors, molecule.ff['sigma'], molecule.ff['epsilon'],
+                                  tile=tile, precision=precision)
+                timings.append(time.perf_counter() - start)
+            error = energy - reference
+            results.append(dict(precision=precision, tile=tile, energy=energy, error=error,
+                                relative_error=abs(error) / max(abs(reference), 1E-300),
+                                pairs_per_second=n_pairs / min(timings)))
+            print('%-6s | tile %5i | E: %.6e | rel. error: %.2e | %.2e pairs/s' %
+                  (precision, tile, energy, results[-1]['relative_error'], results[-1]['pairs_per_second'])) if verbose else None
+    return results
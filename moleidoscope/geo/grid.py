@@ -0,0 +1,74 @@
+# Date: October 2026
+# Author: Kutay B. Sezginel
+"""
+Uniform spatial hash grid (cell list) for neighbor search
+"""
+import itertools
+import numpy as np
+
+
+_offset = 2 ** 19      # Cell indices are shifted to be positive and packed into a single integer
+_base = 2 ** 20
+
+
+def _encode(keys):
+    """ Pack (N, 3) integer cell indices into (N,) integer codes """
+    keys = keys.astype(np.int64) + _offset
+    return (keys[:, 0] * _base + keys[:, 1]) * _base + keys[:, 2]
+
+
+class SpatialHash:
+    """
+    Atoms binned into cubic cells of given size; neighbors within cell_size are found by
+    checking the 27 cells around each query point.
+
+    Example usage::
+      >>> grid = SpatialHash(atom_coors, cell_size=3.0)
+      >>> i, j, dist = grid.neighbors(atom_coors, cutoff=3.0)
+    """
+    def __init__(self, coors, cell_size):
+        self.coors = np.asarray(coors, dtype=float).reshape(-1, 3)
+        self.cell_size = cell_size
+        codes = _encode(np.floor(self.coors / cell_size))
+        self.order = np.argsort(codes, kind='stable')
+        self.codes, self.starts, self.counts = np.unique(codes[self.order], return_index=True, return_counts=True)
+
+    def __repr__(self):
+        return "<SpatialHash object with %i atoms in %i cells>" % (len(self.coors), len(self.codes))
+
+    def neighbors(self, points, cutoff=None):
+        """
+        Find (point, atom) pairs closer than cutoff (default: cell size, cannot be larger).
+        Returns point indices, atom indices and distances.
+        """
+        cutoff = self.cell_size if cutoff is None else cutoff
+        if cutoff > self.cell_size:
+            raise ValueError('Cutoff (%.2f) can not be larger than cell size (%.2f)' % (cutoff, self.cell_size))
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if len(self.codes) == 0 or len(points) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+        keys = np.floor(points / self.cell_size).astype(np.int64)
+        point_index, atom_index = [], []
+        for offset in itertools.product((-1, 0, 1), repeat=3):
+            codes = _encode(keys + offset)
+            cell = np.searchsorted(self.codes, codes)
+            cell = np.minimum(cell, len(self.codes) - 1)
+            found = np.where(self.codes[cell] == codes)[0]
+            counts = self.counts[cell[found]]
+            # Expand each point into one entry per atom in its neighbor cell
+            p = np.repeat(found, counts)
+            first = np.repeat(self.starts[cell[found]], counts)
+            within = np.arange(len(p)) - np.repeat(np.cumsum(counts) - counts, counts)
+            point_index.append(p)
+            atom_index.append(self.order[first + within])
+        point_index = np.concatenate(point_index)
+        atom_index = np.concatenate(atom_index)
+        dist = np.linalg.norm(points[point_index] - self.coors[atom_index], axis=1)
+        close = dist <= cutoff
+        return point_index[close], atom_index[close], dist[close]
+
+    def pairs(self, cutoff=None):
+        """ Unique atom pairs (i < j) closer than cutoff, returns atom indices and distances """
+        i, j, dist = self.neighbors(self.coors, cutoff=cutoff)
+        upper = i < j
+        return i[upper], j[upper], dist[upper]
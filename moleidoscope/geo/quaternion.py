@@ -1,21 +1,20 @@
 # Date: 2016
 # Author: Kutay B. Sezginel
 """
-Quaternion operations for 3D rotation
+Quaternion operations for 3D rotation (scalar Quaternion and vectorized QuaternionArray)
 """
 import math
 import numpy as np
+from moleidoscope.geo.vector import quaternion_matrix
 
 
 class Quaternion(object):
     """
     Quaternion class for quaternion operations and 3D rotations.
+    Single quaternion view of QuaternionArray, arithmetic is done by the vectorized operations.
     """
     def __init__(self, input):
-        self.w = input[0]
-        self.x = input[1]
-        self.y = input[2]
-        self.z = input[3]
+        self.q = np.array(input, dtype=float).reshape(4)
 
     def __repr__(self):
         return "<Quaternion object w:%s x:%s y:%s z:%s>" % (self.w, self.x, self.y, self.z)
@@ -23,15 +22,47 @@ class Quaternion(object):
     def __str__(self):
         return "x:%s y:%s z:%s" % (self.x, self.y, self.z)
 
+    @property
+    def w(self):
+        return float(self.q[0])
+
+    @w.setter
+    def w(self, value):
+        self.q[0] = value
+
+    @property
+    def x(self):
+        return float(self.q[1])
+
+    @x.setter
+    def x(self, value):
+        self.q[1] = value
+
+    @property
+    def y(self):
+        return float(self.q[2])
+
+    @y.setter
+    def y(self, value):
+        self.q[2] = value
+
+    @property
+    def z(self):
+        return float(self.q[3])
+
+    @z.setter
+    def z(self, value):
+        self.q[3] = value
+
     def xyz(self):
         """
         Returns x, y, z values of the quaternion in list format.
         """
-        return [self.x, self.y, self.z]
+        return self.q[1:].tolist()
 
     def np(self):
         """ Returns numpy array if x, y, z values. """
-        return np.array([self.x, self.y, self.z])
+        return self.q[1:].copy()
 
     def __mul__(self, quat2):
         """
@@ -40,18 +71,9 @@ class Quaternion(object):
         Example usage::
           >>> q1 = Quaternion([1, 2, 3, 4])
           >>> q2 = Quaternion([2, 3, 4, 5])
-          >>> q1 * q2 -> <Quaternion object w:-36 x:6 y:12 z:12>
+          >>> q1 * q2 -> <Quaternion object w:-36.0 x:6.0 y:12.0 z:12.0>
         """
-
-        q1 = self
-        q2 = quat2
-
-        w3 = q1.w * q2.w - q1.x * q2.x - q1.y * q2.y - q1.z * q2.z
-        x3 = q1.x * q2.w + q1.w * q2.x - q1.z * q2.y + q1.y * q2.z
-        y3 = q1.y * q2.w + q1.z * q2.x + q1.w * q2.y - q1.x * q2.z
-        z3 = q1.z * q2.w - q1.y * q2.x + q1.x * q2.y + q1.w * q2.z
-
-        return Quaternion([w3, x3, y3, z3])
+        return Quaternion(_multiply(self.q, quat2.q))
 
     def __truediv__(self, quat2):
         """
@@ -69,9 +91,7 @@ class Quaternion(object):
         Returns the inverse of the quaternion as a new quaternion.
 
         """
-        norm = self.w ** 2 + self.x ** 2 + self.y ** 2 + self.z ** 2
-
-        return Quaternion([self.w / norm, -self.x / norm, -self.y / norm, -self.z / norm])
+        return self.array().inv()[0]
 
     def rotation(self, rotation_point, axis_point1, axis_point2, rotation_angle):
         """
@@ -83,28 +103,208 @@ class Quaternion(object):
          >>> Q = Q.rotation(Q.xyz(), [-2, 4, 6.1], [0.3, 1.2, -0.76], math.pi/6)
          >>> [2.1192250600275795, 2.2773560513200133, 5.890236840657188]
         """
-        i = axis_point2[0] - axis_point1[0]
-        j = axis_point2[1] - axis_point1[1]
-        k = axis_point2[2] - axis_point1[2]
-        length = math.sqrt(i**2 + j**2 + k**2)
-        i = i / length
-        j = j / length
-        k = k / length
-        qp_w = 0
-        qp_x = rotation_point[0] - axis_point2[0]
-        qp_y = rotation_point[1] - axis_point2[1]
-        qp_z = rotation_point[2] - axis_point2[2]
-        Q_point = Quaternion([qp_w, qp_x, qp_y, qp_z])
-
-        qr_w = math.cos(rotation_angle / 2.0)
-        qr_x = math.sin(rotation_angle / 2.0) * i
-        qr_y = math.sin(rotation_angle / 2.0) * j
-        qr_z = math.sin(rotation_angle / 2.0) * k
-        Q_rot = Quaternion([qr_w, qr_x, qr_y, qr_z])
-
-        Quat = (Q_rot * Q_point) * Q_rot.inv()
-        Quat.x = Quat.x + axis_point2[0]
-        Quat.y = Quat.y + axis_point2[1]
-        Quat.z = Quat.z + axis_point2[2]
-
-        return Quat
+        axis_point2 = np.asarray(axis_point2, dtype=float)
+        axis = axis_point2 - np.asarray(axis_point1, dtype=float)
+        rotation = QuaternionArray.from_axis_angle(axis, rotation_angle)
+        point = rotation.rotate(np.asarray(rotation_point, dtype=float) - axis_point2)[0, 0] + axis_point2
+        return Quaternion([0, *point])
+
+    def array(self):
+        """ Returns quaternion as a single element QuaternionArray. """
+        return QuaternionArray(self.q)
+
+
+def _multiply(q1, q2):
+    """ Hamilton product of quaternion arrays (..., 4) with numpy broadcasting. """
+    w1, x1, y1, z1 = q1[..., 0], q1[..., 1], q1[..., 2], q1[..., 3]
+    w2, x2, y2, z2 = q2[..., 0], q2[..., 1], q2[..., 2], q2[..., 3]
+    return np.stack([w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+                     x1 * w2 + w1 * x2 - z1 * y2 + y1 * z2,
+                     y1 * w2 + z1 * x2 + w1 * y2 - x1 * z2,
+                     z1 * w2 - y1 * x2 + x1 * y2 + w1 * z2], axis=-1)
+
+
+def _multiply_loop(q1, q2, out):
+    """ Hamilton product of two (M, 4) quaternion arrays written into out (numba kernel). """
+    for i in range(q1.shape[0]):
+        w1, x1, y1, z1 = q1[i, 0], q1[i, 1], q1[i, 2], q1[i, 3]
+        w2, x2, y2, z2 = q2[i, 0], q2[i, 1], q2[i, 2], q2[i, 3]
+        out[i, 0] = w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2
+        out[i, 1] = x1 * w2 + w1 * x2 - z1 * y2 + y1 * z2
+        out[i, 2] = y1 * w2 + z1 * x2 + w1 * y2 - x1 * z2
+        out[i, 3] = z1 * w2 - y1 * x2 + x1 * y2 + w1 * z2
+
+
+def _rotate_loop(q, points, out):
+    """ Rotate (N, 3) points with each (M, 4) unit quaternion into (M, N, 3) out (numba kernel). """
+    for m in range(q.shape[0]):
+        w, x, y, z = q[m, 0], q[m, 1], q[m, 2], q[m, 3]
+        for n in range(points.shape[0]):
+            px, py, pz = points[n, 0], points[n, 1], points[n, 2]
+            # t = 2 * (q_xyz x p), p' = p + w * t + q_xyz x t
+            tx = 2 * (y * pz - z * py)
+            ty = 2 * (z * px - x * pz)
+            tz = 2 * (x * py - y * px)
+            out[m, n, 0] = px + w * tx + y * tz - z * ty
+            out[m, n, 1] = py + w * ty + z * tx - x * tz
+            out[m, n, 2] = pz + w * tz + x * ty - y * tx
+
+
+_kernels = {}
+jit_threshold = 100000      # Minimum number of operations to use numba kernels (compiled on first use)
+
+
+def jit_kernels():
+    """ Compile numba kernels on first use (returns None if numba is not installed) """
+    if 'multiply' not in _kernels:
+        try:
+            import numba
+            _kernels['multiply'] = numba.njit(_multiply_loop)
+            _kernels['rotate'] = numba.njit(_rotate_loop)
+        except ImportError:
+            _kernels['multiply'] = _kernels['rotate'] = None
+    return _kernels if _kernels['multiply'] is not None else None
+
+
+class QuaternionArray(object):
+    """
+    Array of quaternions stored as (M, 4) numpy array with w, x, y, z columns.
+    Operations are vectorized over all quaternions (numba kernels are used if numba is installed).
+
+    Example usage::
+      >>> Q = QuaternionArray.from_axis_angle([0, 0, 1], np.linspace(0, np.pi, 10))
+      >>> Q.rotate([[1, 0, 0]]) -> (10, 1, 3) array of rotated points
+      >>> Q[3] -> <Quaternion object w:0.9396 x:0.0 y:0.0 z:0.3420>
+    """
+    def __init__(self, input):
+        self.q = np.atleast_2d(np.asarray(input, dtype=float))
+
+    def __repr__(self):
+        return "<QuaternionArray object with %i quaternions>" % len(self.q)
+
+    def __len__(self):
+        return len(self.q)
+
+    def __getitem__(self, index):
+        """ Returns scalar Quaternion for integer index and QuaternionArray for slices. """
+        if isinstance(index, (int, np.integer)):
+            return Quaternion(self.q[index].tolist())
+        return QuaternionArray(self.q[index])
+
+    @classmethod
+    def identity(cls, n=1):
+        """ Returns n identity quaternions. """
+        q = np.zeros((n, 4))
+        q[:, 0] = 1
+        return cls(q)
+
+    @classmethod
+    def from_axis_angle(cls, axis, angle):
+        """
+        Rotation quaternions for given axes ((3,) or (M, 3)) and angles (scalar or (M,)) in radians.
+        """
+        axis = np.atleast_2d(np.asarray(axis, dtype=float))
+        axis = axis / np.linalg.norm(axis, axis=1)[:, None]
+        half_angle = np.atleast_1d(np.asarray(angle, dtype=float)) / 2
+        axis, half_angle = np.broadcast_arrays(axis, half_angle[:, None])
+        q = np.empty((len(axis), 4))
+        q[:, 0] = np.cos(half_angle[:, 0])
+        q[:, 1:] = np.sin(half_angle) * axis
+        return cls(q)
+
+    @classmethod
+    def from_matrix(cls, matrices):
+        """ Unit quaternions for given (M, 3, 3) rotation matrices. """
+        m = np.asarray(matrices, dtype=float).reshape(-1, 3, 3)
+        # Choose the largest of w, x, y, z to divide by for numerical stability
+        trace = np.stack([m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2],
+                          m[:, 0, 0] - m[:, 1, 1] - m[:, 2, 2],
+                          m[:, 1, 1] - m[:, 0, 0] - m[:, 2, 2],
+                          m[:, 2, 2] - m[:, 0, 0] - m[:, 1, 1]], axis=1)
+        largest = np.argmax(trace, axis=1)
+        s = np.sqrt(1 + trace[np.arange(len(m)), largest]) * 2
+        q = np.empty((len(m), 4))
+        sel = largest == 0
+        q[sel] = np.stack([s[sel] / 4,
+                           (m[sel, 2, 1] - m[sel, 1, 2]) / s[sel],
+                           (m[sel, 0, 2] - m[sel, 2, 0]) / s[sel],
+                           (m[sel, 1, 0] - m[sel, 0, 1]) / s[sel]], axis=1)
+        sel = largest == 1
+        q[sel] = np.stack([(m[sel, 2, 1] - m[sel, 1, 2]) / s[sel],
+                           s[sel] / 4,
+                           (m[sel, 0, 1] + m[sel, 1, 0]) / s[sel],
+                           (m[sel, 0, 2] + m[sel, 2, 0]) / s[sel]], axis=1)
+        sel = largest == 2
+        q[sel] = np.stack([(m[sel, 0, 2] - m[sel, 2, 0]) / s[sel],
+                           (m[sel, 0, 1] + m[sel, 1, 0]) / s[sel],
+                           s[sel] / 4,
+                           (m[sel, 1, 2] + m[sel, 2, 1]) / s[sel]], axis=1)
+        sel = largest == 3
+        q[sel] = np.stack([(m[sel, 1, 0] - m[sel, 0, 1]) / s[sel],
+                           (m[sel, 0, 2] + m[sel, 2, 0]) / s[sel],
+                           (m[sel, 1, 2] + m[sel, 2, 1]) / s[sel],
+                           s[sel] / 4], axis=1)
+        return cls(q)
+
+    def __mul__(self, other):
+        """ Hamilton product with another QuaternionArray (same length or single quaternion). """
+        q1, q2 = self.q, other.q
+        kernels = jit_kernels() if len(q1) >= jit_threshold else None
+        if kernels is not None and q1.shape == q2.shape:
+            out = np.empty_like(q1)
+            kernels['multiply'](np.ascontiguousarray(q1), np.ascontiguousarray(q2), out)
+            return QuaternionArray(out)
+        return QuaternionArray(_multiply(q1, q2))
+
+    def outer(self, other):
+        """ Products of all quaternion pairs as (M, K, 4) array (e.g. group multiplication table). """
+        return _multiply(self.q[:, None, :], other.q[None, :, :])
+
+    def norm(self):
+        """ Returns (M,) array of quaternion norms. """
+        return np.linalg.norm(self.q, axis=1)
+
+    def normalize(self):
+        """ Returns unit quaternions. """
+        return QuaternionArray(self.q / self.norm()[:, None])
+
+    def conjugate(self):
+        """ Returns conjugate quaternions. """
+        return QuaternionArray(self.q * np.array([1, -1, -1, -1]))
+
+    def inv(self):
+        """ Returns inverse quaternions. """
+        return QuaternionArray(self.conjugate().q / (self.norm() ** 2)[:, None])
+
+    def matrix(self):
+        """ Returns (M, 3, 3) rotation matrices of unit quaternions. """
+        return quaternion_matrix(self.q)
+
+    def rotate(self, points):
+        """ Rotate (N, 3) points around the origin with each unit quaternion, returns (M, N, 3) array. """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        kernels = jit_kernels() if len(self.q) * len(points) >= jit_threshold else None
+        if kernels is not None:
+            out = np.empty((len(self.q), len(points), 3))
+            kernels['rotate'](np.ascontiguousarray(self.q), np.ascontiguousarray(points), out)
+            return out
+        return np.einsum('mij,nj->mni', self.matrix(), points)
+
+    def slerp(self, other, t):
+        """
+        Spherical linear interpolation between unit quaternions of self (t = 0) and other (t = 1).
+            - t: interpolation parameter(s), scalar or (M,) array
+        """
+        q1, q2 = self.q, other.q
+        t = np.asarray(t, dtype=float).reshape(-1, 1)
+        dot = np.sum(q1 * q2, axis=1, keepdims=True)
+        # Take the shorter arc (q and -q are the same rotation)
+        q2 = np.where(dot < 0, -q2, q2)
+        dot = np.abs(dot)
+        theta = np.arccos(np.clip(dot, -1, 1))
+        sin_theta = np.sin(theta)
+        close = sin_theta < 1E-8
+        safe_sin = np.where(close, 1, sin_theta)
+        w1 = np.where(close, 1 - t, np.sin((1 - t) * theta) / safe_sin)
+        w2 = np.where(close, t, np.sin(t * theta) / safe_sin)
+        return QuaternionArray(w1 * q1 + w2 * q2).normalize()
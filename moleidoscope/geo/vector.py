@@ -8,18 +8,94 @@ import numpy as np
 
 
 def align(v1, v2, norm=True):
-    """ Calculates the rotation axis and angle to align v1 with v2. """
+    """
+    Calculates the rotation axis and angle to align v1 with v2.
+    For parallel and antiparallel vectors a unit axis perpendicular to v1 is returned.
+    """
     if norm:
         v1 = np.array(v1) / np.linalg.norm(v1)
         v2 = np.array(v2) / np.linalg.norm(v2)
     rotation_axis = np.cross(v1, v2)
     d = np.dot(v1, v2)
-    angle = np.arccos(d)
+    angle = np.arccos(np.clip(d, -1, 1))
     if math.isnan(angle):
         angle = 0
+    if np.linalg.norm(rotation_axis) < 1E-8:
+        rotation_axis = perpendicular(v1)
     return rotation_axis, angle
 
 
+def perpendicular(vectors):
+    """ Returns unit vector(s) perpendicular to given vector(s) ((3,) or (M, 3) array) """
+    vectors = np.asarray(vectors, dtype=float)
+    v = np.atleast_2d(vectors)
+    # Cross with the coordinate axis least aligned with each vector
+    axes = np.identity(3)[np.argmin(np.abs(v), axis=1)]
+    perp = np.cross(v, axes)
+    perp /= np.linalg.norm(perp, axis=1)[:, None]
+    return perp.reshape(vectors.shape)
+
+
+def align_batch(v1, v2, quaternion=False):
+    """
+    Calculates rotations to align each vector in v1 with corresponding vector in v2.
+        - v1, v2: (M, 3) arrays or single vectors of shape (3,) (broadcast against the other)
+        - quaternion: return (M, 4) unit quaternions (w, x, y, z) instead of (M, 3, 3) matrices
+    Parallel vectors give identity and antiparallel vectors give a 180 degree rotation around
+    an axis perpendicular to v1.
+
+    Example usage::
+      >>> matrices = align_batch(linker.vector, edge_vectors)
+      >>> aligned_coors = transform_batch(linker.atom_coors, matrices)
+    """
+    v1, v2 = np.broadcast_arrays(np.atleast_2d(np.asarray(v1, dtype=float)),
+                                 np.atleast_2d(np.asarray(v2, dtype=float)))
+    v1 = v1 / np.linalg.norm(v1, axis=1)[:, None]
+    v2 = v2 / np.linalg.norm(v2, axis=1)[:, None]
+    # Half-angle quaternion: q = (1 + v1.v2, v1 x v2) normalized
+    q = np.empty((len(v1), 4))
+    q[:, 0] = 1 + np.einsum('ij,ij->i', v1, v2)
+    q[:, 1:] = np.cross(v1, v2)
+    antiparallel = q[:, 0] < 1E-8
+    if np.any(antiparallel):
+        q[antiparallel, 0] = 0
+        q[antiparallel, 1:] = perpendicular(v1[antiparallel])
+    q /= np.linalg.norm(q, axis=1)[:, None]
+    if quaternion:
+        return q
+    return quaternion_matrix(q)
+
+
+def quaternion_matrix(q):
+    """ Convert (M, 4) unit quaternions (w, x, y, z) to (M, 3, 3) rotation matrices """
+    q = np.atleast_2d(np.asarray(q, dtype=float))
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    matrices = np.empty((len(q), 3, 3))
+    matrices[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    matrices[:, 0, 1] = 2 * (x * y - z * w)
+    matrices[:, 0, 2] = 2 * (x * z + y * w)
+    matrices[:, 1, 0] = 2 * (x * y + z * w)
+    matrices[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    matrices[:, 1, 2] = 2 * (y * z - x * w)
+    matrices[:, 2, 0] = 2 * (x * z - y * w)
+    matrices[:, 2, 1] = 2 * (y * z + x * w)
+    matrices[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return matrices
+
+
+def transform_batch(coors, matrices):
+    """
+    Apply each rotation matrix to a set of coordinates.
+        - coors: (N, 3) coordinates (same set for all matrices) or (M, N, 3) coordinates
+        - matrices: (M, 3, 3) rotation matrices
+    Returns (M, N, 3) array of transformed coordinates.
+    """
+    coors = np.asarray(coors, dtype=float)
+    if coors.ndim == 2:
+        return np.einsum('mij,nj->mni', matrices, coors)
+    return np.einsum('mij,mnj->mni', matrices, coors)
+
+
 def find_closest(target, coor_list):
     """ Find closest coordinate to a set of coordinates """
     target = np.array(target)
@@ -31,3 +107,18 @@ def find_closest(target, coor_list):
     min_d = sorted_distances[0]
     dist_index = distances.index(min_d)
     return coor_list[dist_index]
+
+
+def kabsch(coors_1, coors_2):
+    """
+    Calculates rotation matrix that best superimposes coors_1 onto coors_2 (both centered).
+    Rotated coordinates: R.dot(c1 - center_1) + center_2
+    """
+    p = np.asarray(coors_1, dtype=float)
+    q = np.asarray(coors_2, dtype=float)
+    p = p - p.mean(axis=0)
+    q = q - q.mean(axis=0)
+    u, s, vt = np.linalg.svd(np.dot(p.T, q))
+    d = np.sign(np.linalg.det(np.dot(vt.T, u.T)))
+    d = 1.0 if d == 0 else d
+    return np.dot(vt.T * [1, 1, d], u.T)
@@ -7,20 +7,30 @@ import os
 import math
 import copy
 import numpy as np
-from moleidoscope.geo.quaternion import Quaternion
+from moleidoscope.geo.quaternion import QuaternionArray
 from moleidoscope.mirror import Mirror
 from moleidoscope.hd import read_library
 from moleidoscope.output import save
 from moleidoscope.input import read_xyz
-from moleidoscope.geo.vector import align
+from moleidoscope.geo.vector import align_batch
+from moleidoscope.bonds import BondGraph
 
 
-hd_dir = os.environ['HD_DIR']
-library_path = os.path.join(hd_dir, 'LIBRARY')
-if os.path.exists(library_path):
-    hd_lib = read_library(library_path)
-else:
-    print('HostDesigner directory not found in environment variables!')
+hd_dir = os.environ.get('HD_DIR')
+library_path = os.path.join(hd_dir, 'LIBRARY') if hd_dir is not None else None
+hd_lib = None
+
+
+def get_library():
+    """ Read HostDesigner library on first use """
+    global hd_lib
+    if hd_lib is None:
+        if library_path is None:
+            raise EnvironmentError('HostDesigner directory not found, set HD_DIR environment variable!')
+        if not os.path.exists(library_path):
+            raise FileNotFoundError('HostDesigner LIBRARY not found in %s!' % hd_dir)
+        hd_lib = read_library(library_path)
+    return hd_lib
 
 
 class Linker:
@@ -46,14 +56,20 @@ class Linker:
         """ Returns a deepcopy of linker object """
         return copy.deepcopy(self)
 
-    def read_linker(self, linker_index, library=hd_lib):
-        """ Read linker information into object from the library """
+    def read_linker(self, linker_index, library=None):
+        """ Read linker information into object from the library (default: HostDesigner library) """
+        if library is None:
+            library = get_library()
         self.index = linker_index
         self.name = library['linker_names'][linker_index - 1]
         self.atom_names = library['atom_names'][linker_index - 1]
         self.atom_coors = library['atom_coors'][linker_index - 1]
         self.num_of_atoms = library['number_of_atoms'][linker_index - 1]
         self.connectivity = library['connectivity'][linker_index - 1]
+        if self.connectivity['coors'] is not None:
+            self.connections = self.connectivity['coors']
+            self.vector = np.array(self.connections[1]) - np.array(self.connections[0])
+            self.length = self.connectivity['dummy_dist']
 
     def read_host(self, host):
         """ Read host object into linker object """
@@ -114,17 +130,20 @@ class Linker:
 
     def rotate(self, angle, axis):
         """ Rotate linker with given angle and axis """
-        Q = Quaternion([0, 1, 1, 1])
-        rotated_coors = []
-        for coor in self.atom_coors:
-            x, y, z = Q.rotation(coor, [0, 0, 0], axis, angle).xyz()
-            rotated_coors.append([x, y, z])
+        Q = QuaternionArray.from_axis_angle(axis, angle)
+        rotated_coors = Q.rotate(self.atom_coors)[0].tolist()
 
         rotated_linker = self.copy()
         rotated_linker.name = '%s_R' % self.name
         rotated_linker.atom_coors = rotated_coors
         return rotated_linker
 
+    def transform(self, matrix):
+        """ Apply 3x3 transformation (rotation) matrix to linker coordinates around the origin """
+        transformed_linker = self.copy()
+        transformed_linker.atom_coors = np.dot(np.array(self.atom_coors, dtype=float), np.array(matrix).T).tolist()
+        return transformed_linker
+
     def rotoreflect(self, angle, axis, mirror_plane, translate=None):
         """ Improper rotation with given angle, axis and reflection plane """
         rotated_linker = self.rotate(angle, axis)
@@ -164,9 +183,9 @@ class Linker:
 
     def align(self, vector, translate=[0, 0, 0]):
         """ Align linker to given vector and translate """
-        rotation_axis, angle = align(self.vector, vector)   # Get rotation axis and angle to align linker
+        rotation = align_batch(self.vector, vector)[0]   # Get rotation matrix to align linker
         dest = np.array(translate)
-        aligned_linker = self.rotate(angle, rotation_axis)
+        aligned_linker = self.transform(rotation)
         aligned_linker.center(dest)
         return aligned_linker
 
@@ -176,15 +195,26 @@ class Linker:
         c2 = np.array(self.atom_coors[atom2])
         return (c2 - c1)
 
+    def get_bonds(self, tolerance=0.45):
+        """ Perceive bonds from covalent radii once and return bond graph (see bonds.BondGraph) """
+        if getattr(self, 'bonds', None) is None:
+            self.bonds = BondGraph.perceive(self.atom_names, self.atom_coors, tolerance=tolerance)
+        return self.bonds
+
     def remove(self, atom_indices):
-        """ Remove atoms with given indices """
+        """ Remove atoms with given indices (deleted from the last so that indices stay valid) """
+        atom_indices = sorted(set(atom_indices), reverse=True)
         for i in atom_indices:
             del self.atom_names[i]
             del self.atom_coors[i]
+        if getattr(self, 'bonds', None) is not None:
+            self.bonds = self.bonds.remove(atom_indices)
 
     def join(self, *args):
         """ Join multiple linker objects into single linker object """
         joined_linker = self.copy()
+        if getattr(self, 'bonds', None) is not None:
+            joined_linker.bonds = BondGraph.concatenate([l.get_bonds() for l in (self,) + args])
         for other_linker in args:
             joined_linker.atom_coors += other_linker.atom_coors
             joined_linker.atom_names += other_linker.atom_names
@@ -4,35 +4,61 @@
 File output methods (formats: pdb / xyz / yaml / orca)
 """
 import os
+import io
+import csv
+import time
+import tarfile
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import yaml
+from moleidoscope.descriptors import formula
+
+
+# Used when no ORCA setup template is given (charge 0, multiplicity 1)
+default_orca_setup = '! SP\n\n* xyz 0 1\n'
 
 
 def save(molecule, file_name='mol', file_format='yaml', save_dir=None, setup=None):
     """ Save object to selected format """
     file_path = os.path.join(save_dir, '%s.%s' % (file_name, file_format))
     with open(file_path, 'w') as file_object:
-        if file_format is 'yaml':
+        if file_format == 'yaml':
             yaml.dump(molecule, file_object)
-        elif file_format is 'xyz':
+        elif file_format == 'xyz':
             write_xyz(file_object, molecule.atom_names, molecule.atom_coors, header=file_name)
-        elif file_format is 'pdb':
-            write_pdb(file_object, molecule.atom_names, molecule.atom_coors, header=file_name)
-        elif file_format is 'orca':
+        elif file_format == 'pdb':
+            write_pdb(file_object, molecule.atom_names, molecule.atom_coors, header=file_name,
+                      bonds=getattr(molecule, 'bonds', None))
+        elif file_format == 'orca':
             write_orca(file_object, molecule.atom_names, molecule.atom_coors, header=file_name, setup=setup)
     return file_path
 
 
-def write_pdb(pdb_file, names, coors, header='mol'):
-    """ Write given atomic coordinates to file object in pdb format """
+def write_pdb(pdb_file, names, coors, header='mol', bonds=None):
+    """ Write given atomic coordinates to file object in pdb format (bonds: BondGraph for CONECT records) """
     pdb_file.write('HEADER    ' + header + '\n')
     format = 'HETATM%5d%3s  MOL     1     %8.3f%8.3f%8.3f  1.00  0.00          %2s\n'
     for atom_index, (atom_name, atom_coor) in enumerate(zip(names, coors), start=1):
         x, y, z = atom_coor
         pdb_file.write(format % (atom_index, atom_name, x, y, z, atom_name.rjust(2)))
+    if bonds is not None:
+        pdb_file.write(conect_records(bonds))
     pdb_file.write('END\n')
     pdb_file.flush()
 
 
+def conect_records(bonds):
+    """ PDB CONECT records for given BondGraph (at most 4 bonded atoms per record) """
+    records = []
+    for atom in range(bonds.n_atoms):
+        neighbors = (bonds.neighbors(atom) + 1).tolist()
+        for start in range(0, len(neighbors), 4):
+            records.append('CONECT%5d' % (atom + 1) + ''.join(['%5d' % n for n in neighbors[start:start + 4]]) + '\n')
+    return ''.join(records)
+
+
 def write_xyz(xyz_file, names, coors, header='mol'):
     """ Write given atomic coordinates to file object in xyz format """
     xyz_file.write(str(len(coors)) + '\n')
@@ -43,15 +69,88 @@ def write_xyz(xyz_file, names, coors, header='mol'):
     xyz_file.flush()
 
 
+def read_orca_setup(setup=None):
+    """
+    Read ORCA setup template (keywords, blocks and coordinate header, ex: '! B3LYP def2-SVP\\n* xyz 0 1')
+        - setup: template file path or template string (default: default_orca_setup)
+    """
+    if setup is None:
+        return default_orca_setup
+    if os.path.isfile(setup):
+        with open(setup, 'r') as orca_setup:
+            setup = orca_setup.read()
+    return setup.rstrip() + '\n'
+
+
+def orca_string(names, coors, setup_text, header='mol'):
+    """ Format ORCA input for given atomic coordinates and setup template text (see read_orca_setup) """
+    coors = np.asarray(coors, dtype=float).reshape(-1, 3).tolist()
+    values = tuple([value for name, coor in zip(names, coors) for value in (name, *coor)])
+    return '# %s\n%s%s*\n' % (header, setup_text, ('%s %.4f %.4f %.4f\n' * len(names)) % values)
+
+
 def write_orca(orca_file, names, coors, header='mol', setup=None):
-    """ Write given coordinates to file object in orca input format """
-    with open(orca_setup_path, 'r') as orca_setup:
-        orca_setup_lines = orca_setup.readlines()
-    for line in orca_setup_lines:
-        orca_file.write(line)
-    orca_file.write('\n')
-    format = '%s %.4f %.4f %.4f\n'
-    for atom, coor in zip(names, coors):
-        xyz_file.write(format % (atom, coor[0], coor[1], coor[2]))
-    orca_file.write('\n*')
+    """ Write given coordinates to file object in orca input format (setup: template file path or string) """
+    orca_file.write(orca_string(names, coors, read_orca_setup(setup), header=header))
     orca_file.flush()
+
+
+def _write_text(path, text):
+    with open(path, 'w') as text_file:
+        text_file.write(text)
+
+
+def write_orca_deck(molecules, deck_path, setup=None, job_names=None, metadata=None, n_workers=8, verbose=False):
+    """
+    Write ORCA inputs for many structures, the setup template is read only once.
+        - molecules: structures with atom_names / atom_coors (ex: list of Polyhedra)
+        - deck_path: directory for input files or a single archive file (.zip / .tar / .tar.gz / .tgz)
+        - setup: ORCA setup template file path or string (see read_orca_setup)
+        - job_names: input file names without extension (default: <molecule name>_<index>)
+        - metadata: list of dictionaries with extra manifest columns for each structure (ex: energy)
+        - n_workers: number of threads writing input files to a directory
+    A manifest (manifest.csv: job, file, n_atoms, formula and metadata columns) is written with the inputs.
+    Returns list of manifest rows.
+
+    Example usage::
+      >>> write_orca_deck(top_cages, 'deck.tar.gz', setup='orca_setup.txt', metadata=[{'energy': c.energy} for c in top_cages])
+    """
+    start = time.time()
+    setup_text = read_orca_setup(setup)
+    if job_names is None:
+        job_names = ['%s_%i' % (getattr(molecule, 'name', 'mol'), i) for i, molecule in enumerate(molecules, start=1)]
+    if metadata is None:
+        metadata = [{}] * len(molecules)
+    inputs, manifest = [], []
+    for job, molecule, extra in zip(job_names, molecules, metadata):
+        inputs.append(('%s.inp' % job, orca_string(molecule.atom_names, molecule.atom_coors, setup_text, header=job)))
+        manifest.append(dict(job=job, file=inputs[-1][0], n_atoms=len(molecule.atom_names),
+                             formula=formula(Counter(molecule.atom_names)), **extra))
+
+    columns = list(manifest[0]) if manifest else ['job', 'file', 'n_atoms', 'formula']
+    for row in manifest:
+        columns += [c for c in row if c not in columns]
+    manifest_file = io.StringIO()
+    writer = csv.DictWriter(manifest_file, fieldnames=columns)
+    writer.writeheader()
+    writer.writerows(manifest)
+    inputs.append(('manifest.csv', manifest_file.getvalue()))
+
+    if deck_path.endswith('.zip'):
+        with zipfile.ZipFile(deck_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for file_name, text in inputs:
+                archive.writestr(file_name, text)
+    elif deck_path.endswith(('.tar', '.tar.gz', '.tgz')):
+        with tarfile.open(deck_path, 'w:gz' if deck_path.endswith('gz') else 'w') as archive:
+            for file_name, text in inputs:
+                data = text.encode()
+                info = tarfile.TarInfo(file_name)
+                info.size, info.mtime = len(data), time.time()
+                archive.addfile(info, io.BytesIO(data))
+    else:
+        os.makedirs(deck_path, exist_ok=True)
+        paths = [os.path.join(deck_path, file_name) for file_name, text in inputs]
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            list(executor.map(_write_text, paths, [text for file_name, text in inputs]))
+    print('Wrote %i ORCA inputs to %s in %.2f s' % (len(manifest), deck_path, time.time() - start)) if verbose else None
+    return manifest
@@ -0,0 +1,76 @@
+# Date: October 2026
+# Author: Kutay B. Sezginel
+"""
+Periodic packing energy of polyhedra in a crystal lattice
+"""
+import itertools
+import numpy as np
+from moleidoscope.geo.grid import SpatialHash
+
+
+def cell_matrix(cell):
+    """ Unit cell vectors as rows of a 3x3 matrix from lengths (a, b, c) or 3x3 vectors """
+    cell = np.array(cell, dtype=float)
+    if cell.shape == (3,):
+        return np.diag(cell)
+    return cell.reshape(3, 3)
+
+
+def cell_widths(cell):
+    """ Perpendicular widths of the unit cell (distance between opposite faces) """
+    volume = abs(np.linalg.det(cell))
+    return np.array([volume / np.linalg.norm(np.cross(cell[(i + 1) % 3], cell[(i + 2) % 3])) for i in range(3)])
+
+
+def image_shifts(cell, reach):
+    """ Translation vectors of all periodic images (except the central one) within given reach """
+    n_max = np.ceil(reach / cell_widths(cell)).astype(int)
+    shifts = []
+    for n in itertools.product(*[range(-m, m + 1) for m in n_max]):
+        if n != (0, 0, 0):
+            shift = np.dot(n, cell)
+            if np.linalg.norm(shift) <= reach:
+                shifts.append(shift)
+    return np.array(shifts).reshape(-1, 3)
+
+
+def packing_energy(polyhedra, cell, cutoff=12.0, convention='cutoff', intra=None):
+    """
+    Calculate Lennard-Jones energy of a polyhedra packed in a periodic lattice (one polyhedra per unit cell).
+    Requires force field parameters (see Polyhedra.get_force_field).
+        - cell: unit cell lengths (a, b, c) or cell vectors as 3x3 matrix (rows)
+        - cutoff: interaction cutoff distance (Angstrom)
+        - convention: 'cutoff' -> interactions with all periodic images within cutoff
+                      'minimum' -> minimum image convention (cutoff is limited to half the smallest cell width)
+        - intra: intra-cage energy (default: calculated with Polyhedra.get_energy(rigid=True))
+    Image atoms are binned in a cell list so cost scales with the atoms of one cell.
+    Returns dictionary with intra (single cage), inter (cage-cage per unit cell) and total energy.
+    """
+    cell = cell_matrix(cell)
+    if convention == 'minimum':
+        cutoff = min(cutoff, cell_widths(cell).min() / 2)
+    coors = np.array(polyhedra.atom_coors, dtype=float)
+    sigma = np.array(polyhedra.ff['sigma'], dtype=float)
+    epsilon = np.array(polyhedra.ff['epsilon'], dtype=float)
+    if intra is None:
+        intra = polyhedra.get_energy(rigid=True)
+
+    # Image atoms that can be within cutoff of the central cage
+    center = coors.mean(axis=0)
+    radius = np.max(np.linalg.norm(coors - center, axis=1))
+    shifts = image_shifts(cell, 2 * radius + cutoff)
+    image_coors = (coors[None, :, :] + shifts[:, None, :]).reshape(-1, 3)
+    image_atoms = np.tile(np.arange(len(coors)), len(shifts))
+    near = np.linalg.norm(image_coors - center, axis=1) <= radius + cutoff
+    image_coors, image_atoms = image_coors[near], image_atoms[near]
+
+    grid = SpatialHash(image_coors, cell_size=cutoff)
+    i, j, dist = grid.neighbors(coors, cutoff=cutoff)
+    j = image_atoms[j]
+    sig_mix = (sigma[i] + sigma[j]) / 2
+    eps_mix = np.sqrt(epsilon[i] * epsilon[j])
+    sr6 = (sig_mix / np.maximum(dist, 1E-5)) ** 6
+    # Each cage-cage pair is seen from both cages, half of it belongs to one unit cell
+    inter = 0.5 * float(np.sum(4 * eps_mix * (sr6 * sr6 - sr6)))
+    return dict(intra=intra, inter=inter, total=intra + inter, cutoff=cutoff,
+                n_pairs=len(i), n_images=len(shifts))
@@ -10,9 +10,12 @@ import yaml
 import numpy as np
 from random import randint
 from moleidoscope.geo.quaternion import Quaternion
-from moleidoscope.geo.vector import align
-from moleidoscope.forcefield import get_ff_par, lennard_jones, lb_mix, read_ff_parameters
+from moleidoscope.geo.vector import align_batch
+from moleidoscope.geo.quaternion import QuaternionArray
+from moleidoscope.forcefield import get_ff_par, lennard_jones, lb_mix, read_ff_parameters, lj_block, lj_self, lj_batch, lj_tiled, lj_pairs
+from moleidoscope.symmetry import rotation_group, free_subgroup, symmetric_edges, pair_orbits, unique_assignments
 from moleidoscope.linker import Linker
+from moleidoscope.bonds import BondGraph, perceive_contacts
 from moleidoscope.output import save
 
 
@@ -72,25 +75,41 @@ class Polyhedra:
         linker = linker.rotate(angle, self.edge_vectors[edge])
         linker.center(self.edge_centers[edge])
         self.edge_linkers[edge] = linker
+        self.symmetry_orbits = None     # Rotating a single edge can break the symmetry
         self.update()
 
-    def build(self, linker, scale='auto', metal=None, bond_length=1.5):
-        """ Build polyhedra to generate coordinates """
-        if scale is 'auto':
+    def build(self, linker, scale='auto', metal=None, bond_length=1.5, symmetric=False):
+        """
+        Build polyhedra to generate coordinates
+            - symmetric: copy placed linkers to other edges using polyhedra rotations so that the
+                         structure keeps polyhedra symmetry (edges are reoriented accordingly)
+        """
+        if scale == 'auto':
             scale = linker.length + bond_length * 2
         self.linker = linker               # Might not be wise for memory
         self.resize(scale)
+        if symmetric:
+            operations, self.edges = symmetric_edges(self.vertices, self.edges)
         self.get_edge_vectors(norm=True)   # Calculate normalized edge vectors
+        rotations = align_batch(linker.vector, self.edge_vectors)   # Rotation matrices to align linker
+        linker.get_bonds()                 # Perceived once, placed linkers are copies
+        self.metal_bonds = None
 
         self.edge_coors = []
         self.edge_linkers = []
         self.edge_centers = []
-        for i, vec in enumerate(self.edge_vectors):
-            rotation_axis, angle = align(linker.vector, vec)   # Get rotation axis and angle to align linker
+        self.edge_types = [0] * len(self.edges)   # Linker type of each edge (all edges use same linker)
+        self.intra_energies = {}
+        self.symmetry_orbits = None
+        for i in range(len(self.edge_vectors)):
             dest_index_1, dest_index_2 = self.edges[i]    # Get linker destination (mid point of edge)
             dest = (np.array(self.vertices[dest_index_1]) + np.array(self.vertices[dest_index_2])) / 2
             self.edge_centers.append(dest)
-            aligned_linker = linker.rotate(angle, rotation_axis)
+            source, g = operations[i] if symmetric else (None, None)
+            if source is not None:
+                aligned_linker = self.edge_linkers[source].transform(g['matrix'])
+            else:
+                aligned_linker = linker.transform(rotations[i])
             aligned_linker.center(dest)
             self.edge_linkers.append(aligned_linker)
             self.edge_coors.append(aligned_linker.atom_coors)
@@ -99,6 +118,88 @@ class Polyhedra:
             self.metal = metal
         self.update()
 
+    def build_mixed(self, linkers, assignment, scale='auto', metal=None, bond_length=1.5, placements=None):
+        """
+        Build polyhedra with different linker types on its edges
+            - linkers: list of linker types
+            - assignment: linker type index for each edge (ex: [0, 1, 0, ...])
+            - scale: polyhedra size ('auto': longest linker + 2 x bond length)
+            - placements: dictionary of aligned linkers for each (edge, linker type) reused between builds
+                          (only valid for the same polytope, size and linkers, see enumerate_mixed)
+        Linkers are placed as in build(symmetric=True): a linker type is aligned once on one edge of each
+        symmetry class and copied to the other edges with polyhedra rotations (see get_mixed_group), so
+        assignments related by these rotations give identical structures.
+        """
+        if scale == 'auto':
+            scale = max([l.length for l in linkers]) + bond_length * 2
+        self.linkers = linkers
+        self.resize(scale)
+        operations = self.get_mixed_group()[1]
+        self.get_edge_vectors(norm=True)
+        placements = {} if placements is None else placements
+        self.edge_linkers, self.edge_coors, self.edge_centers = [], [], []
+        for edge, (e1, e2) in enumerate(self.edges):
+            self.edge_centers.append((np.array(self.vertices[e1]) + np.array(self.vertices[e2])) / 2)
+        for edge, linker_type in enumerate(assignment):
+            self.edge_linkers.append(self.place_linker(edge, int(linker_type), operations, placements))
+            self.edge_coors.append(self.edge_linkers[-1].atom_coors)
+        self.edge_types = [int(t) for t in assignment]
+        self.intra_energies = {}
+        self.symmetry_orbits = None
+        self.metal_bonds = None
+        if metal is not None:
+            self.metal = metal
+        self.update()
+
+    def place_linker(self, edge, linker_type, operations, placements):
+        """ Aligned linker of given type on an edge, copied from the same linker type on the source edge if any """
+        if (edge, linker_type) not in placements:
+            source, g = operations[edge]
+            if source is not None:
+                aligned_linker = self.place_linker(source, linker_type, operations, placements).transform(g['matrix'])
+            else:
+                self.linkers[linker_type].get_bonds()
+                rotation = align_batch(self.linkers[linker_type].vector, self.edge_vectors[edge])[0]
+                aligned_linker = self.linkers[linker_type].transform(rotation)
+            aligned_linker.center(self.edge_centers[edge])
+            placements[(edge, linker_type)] = aligned_linker
+        return placements[(edge, linker_type)]
+
+    def get_mixed_group(self):
+        """
+        Rotations used to place mixed linkers (see symmetry.free_subgroup) found once for the polytope.
+        No rotation in this group maps an edge onto itself, so they are symmetries of the built structure
+        for any linker shape. Edges are reoriented so that the rotations preserve edge directions.
+        Returns (edge permutations as (G, E) array, copy operations for each edge)
+        """
+        if getattr(self, 'mixed_group', None) is None:
+            subgroup = free_subgroup(rotation_group(self.vertices, self.edges))
+            operations, self.edges = symmetric_edges(self.vertices, self.edges, subgroup=subgroup)
+            self.mixed_group = (np.array([g['edges'] for g in subgroup], dtype=int), operations)
+        return self.mixed_group
+
+    def enumerate_mixed(self, linkers, counts=None, scale='auto', metal=None, bond_length=1.5):
+        """
+        Build symmetry unique mixed linker polyhedra (see symmetry.unique_assignments).
+            - counts: number of edges for each linker type (default: all assignments including single type ones)
+        Assignments are compared with the rotations linkers are placed with (see get_mixed_group).
+        Aligned linker placements are calculated once for each (edge, linker type) and shared by all structures.
+        Yields (assignment, multiplicity, polyhedra) where multiplicity is the number of equivalent assignments.
+
+        Example usage::
+          >>> cube = Polyhedra(lib, 'cube')
+          >>> for assignment, multiplicity, poly in cube.enumerate_mixed([l1, l2], counts=(6, 6), metal='Pd'):
+          ...     poly.get_force_field(ff_par)
+          ...     print(assignment, poly.get_energy(rigid=True))
+        """
+        permutations = self.get_mixed_group()[0]
+        assignments, sizes = unique_assignments(permutations, len(linkers), counts=counts)
+        placements = {}
+        for assignment, multiplicity in zip(assignments, sizes):
+            poly = self.copy()
+            poly.build_mixed(linkers, assignment, scale=scale, metal=metal, bond_length=bond_length, placements=placements)
+            yield assignment.tolist(), int(multiplicity), poly
+
     def add_metal(self, metal='Pd'):
         """ Add metal atoms to vertices """
         bond_length = 1.5
@@ -116,6 +217,24 @@ class Polyhedra:
             self.atom_names += l.atom_names
         if hasattr(self, 'metal'):
             self.add_metal(metal=self.metal)
+        if all(getattr(l, 'bonds', None) is not None for l in self.edge_linkers):
+            self.bonds = BondGraph.concatenate([l.bonds for l in self.edge_linkers], extra=self.get_metal_bonds(),
+                                               n_atoms=len(self.atom_names))
+
+    def get_metal_bonds(self, tolerance=0.45):
+        """
+        Linker-metal bonds as (linker atom, metal atom) indices.
+        Found once after build since edge rotations keep connection atoms on the edge.
+        """
+        if not hasattr(self, 'metal'):
+            return None
+        if getattr(self, 'metal_bonds', None) is None:
+            n_linker_atoms = sum([len(l.atom_names) for l in self.edge_linkers])
+            i, j = perceive_contacts(self.atom_names[:n_linker_atoms], self.atom_coors[:n_linker_atoms],
+                                     self.atom_names[n_linker_atoms:], self.atom_coors[n_linker_atoms:],
+                                     tolerance=tolerance)
+            self.metal_bonds = (i, j + n_linker_atoms)
+        return self.metal_bonds
 
     def get_force_field(self, ff_path, ff_selection='uff'):
         """ Get force field parameters """
@@ -126,9 +245,39 @@ class Polyhedra:
             sig, eps = get_ff_par(atom_name, ff_parameters)
             self.ff['sigma'].append(sig)
             self.ff['epsilon'].append(eps)
+        self.intra_energies = {}
 
-    def get_energy(self):
-        """ Calculate Lennard-Jones energy for structure """
+    def get_energy(self, cache=None, symmetry=False, rigid=False, decompose=False, tiled=False, precision='double',
+                   memory=2E8, exclude_bonded=False, tol=1E-3):
+        """
+        Calculate Lennard-Jones energy for structure
+            - cache: EnergyCache object to look up / store energies of identical configurations
+            - symmetry: calculate only symmetry unique linker / metal interactions (see get_symmetry)
+                        tol: distance tolerance for symmetry operations
+            - rigid: reuse intra-linker energy of each linker type (see get_intra_energy)
+                     and calculate only linker-linker and linker-metal interactions
+            - decompose: store block (linker / metal) and atom energy decomposition (see get_block_energy)
+            - tiled: calculate all atom pairs in tiles within given memory (bytes) for large structures
+                     precision: 'double' / 'single' (see forcefield.lj_tiled)
+            - exclude_bonded: exclude bonded atom pairs (see get_bonded_energy)
+        """
+        if exclude_bonded:
+            energy = self.get_energy(cache=cache, symmetry=symmetry, rigid=rigid, decompose=decompose, tiled=tiled,
+                                     precision=precision, memory=memory, tol=tol)
+            self.energy = energy - self.get_bonded_energy(decompose=decompose)
+            return self.energy
+        if cache is not None and not decompose:
+            # Approximate modes (symmetry tolerance, tiled single precision) are cached separately from exact energies
+            mode = dict(symmetry=tol if symmetry else None, precision=precision if tiled and not (symmetry or rigid) else None)
+            self.energy = cache.energy(self, lambda: self.get_energy(symmetry=symmetry, rigid=rigid, tiled=tiled,
+                                                                     precision=precision, memory=memory, tol=tol),
+                                       mode=sorted(mode.items()))
+            return self.energy
+        if symmetry or rigid or decompose:
+            return self.get_block_energy(symmetry=symmetry, rigid=rigid, decompose=decompose, tol=tol)
+        if tiled:
+            self.energy = lj_tiled(self.atom_coors, self.ff['sigma'], self.ff['epsilon'], memory=memory, precision=precision)
+            return self.energy
         min_dist = 1E-5
         self.energy = 0
         for i_1, (name_1, coor_1) in enumerate(zip(self.atom_names, self.atom_coors)):
@@ -146,6 +295,148 @@ class Polyhedra:
                     self.energy += lennard_jones(dist, sig_mix, eps_mix)
         return self.energy
 
+    def get_bonded_energy(self, decompose=False):
+        """
+        Lennard-Jones energy of bonded atom pairs (see bonds.BondGraph), block and atom energies
+        from get_energy(decompose=True) are corrected to exclude these pairs if decompose is True.
+        """
+        i, j = self.bonds.pairs()
+        energies = lj_pairs(self.atom_coors, self.ff['sigma'], self.ff['epsilon'], i, j)
+        if decompose:
+            starts = [s for s, e in self.get_blocks()]
+            b1, b2 = np.searchsorted(starts, i, side='right') - 1, np.searchsorted(starts, j, side='right') - 1
+            np.add.at(self.block_energies, (b1, b2), -energies)
+            np.add.at(self.block_energies, (b2[b1 != b2], b1[b1 != b2]), -energies[b1 != b2])
+            np.add.at(self.atom_energies, i, -energies / 2)
+            np.add.at(self.atom_energies, j, -energies / 2)
+        return float(np.sum(energies))
+
+    def get_blocks(self):
+        """ Return atom index ranges (start, end) for each edge linker followed by each metal atom """
+        blocks = []
+        start = 0
+        for l in self.edge_linkers:
+            blocks.append((start, start + len(l.atom_coors)))
+            start += len(l.atom_coors)
+        while start < len(self.atom_coors):
+            blocks.append((start, start + 1))
+            start += 1
+        return blocks
+
+    def get_symmetry(self, tol=1E-3):
+        """
+        Find polyhedra rotations that are also symmetry operations of the built structure.
+        A rotation is valid if it maps every linker onto the linker of the mapped edge
+        (same atom names within given distance tolerance, in any atom order).
+        Returns list of block permutations (see get_blocks) for each valid rotation.
+        Symmetry unique block pairs are stored in symmetry_orbits and reused until the structure is rebuilt
+        or an edge is rotated (see relax_edges for rotating all edges together).
+        """
+        coors = np.array(self.atom_coors, dtype=float)
+        blocks = self.get_blocks()
+        n_edges = len(self.edge_linkers)
+        self.symmetry, self.symmetry_flips = [], []
+        for g in rotation_group(self.vertices, self.edges, tol=tol):
+            for edge, new_edge in enumerate(g['edges']):
+                s1, e1 = blocks[edge]
+                s2, e2 = blocks[new_edge]
+                if e1 - s1 != e2 - s2:
+                    break
+                rotated = np.dot(coors[s1:e1] - g['center'], g['matrix'].T) + g['center']
+                dist = np.linalg.norm(rotated[:, None, :] - coors[None, s2:e2, :], axis=2)
+                match = np.argmin(dist, axis=1)
+                if np.max(dist[np.arange(len(match)), match]) > tol:
+                    break
+                if [self.atom_names[s1 + i] for i in range(e1 - s1)] != [self.atom_names[s2 + m] for m in match]:
+                    break
+            else:
+                self.symmetry.append(g['edges'] + [n_edges + v for v in g['vertices'][:len(blocks) - n_edges]])
+                self.symmetry_flips.append(any(g['flip']))
+        self.symmetry_orbits = pair_orbits(self.symmetry, len(blocks))
+        return self.symmetry
+
+    def get_intra_energy(self):
+        """
+        Calculate intra-linker energy once for each linker type.
+        Linkers are rigid copies (build / rotate_edge) so this energy does not change between configurations.
+        Returns dictionary of linker type -> intra-linker energy (atom energies are stored in intra_atom_energies).
+        """
+        blocks = self.get_blocks()
+        edge_types = getattr(self, 'edge_types', list(range(len(self.edge_linkers))))
+        if not hasattr(self, 'intra_energies') or not hasattr(self, 'intra_atom_energies'):
+            self.intra_energies, self.intra_atom_energies = {}, {}
+        for edge, edge_type in enumerate(edge_types):
+            if edge_type not in self.intra_energies:
+                start, end = blocks[edge]
+                energy, atom_energies = lj_self(self.atom_coors[start:end], self.ff['sigma'][start:end],
+                                                self.ff['epsilon'][start:end], per_atom=True)
+                self.intra_energies[edge_type] = energy
+                self.intra_atom_energies[edge_type] = atom_energies
+        return self.intra_energies
+
+    def get_block_energy(self, symmetry=False, rigid=False, decompose=False, tol=1E-3):
+        """
+        Calculate Lennard-Jones energy as a sum of linker / metal block interactions
+            - symmetry: calculate only symmetry unique block pairs (weighted by multiplicity)
+            - rigid: use cached intra-linker energies instead of calculating them
+            - decompose: store energy decomposition calculated in the same pass (all block pairs are calculated):
+                - block_energies: (blocks x blocks) matrix of interaction energies (see get_blocks)
+                                  linkers first (edge order) then metals (vertex order), diagonal is intra-block energy
+                - atom_energies: energy of each atom (half of each pair energy it takes part in)
+        """
+        coors = np.array(self.atom_coors, dtype=float)
+        sigma, epsilon = np.array(self.ff['sigma']), np.array(self.ff['epsilon'])
+        blocks = self.get_blocks()
+        n_edges = len(self.edge_linkers)
+        if symmetry and not decompose:
+            if getattr(self, 'symmetry_orbits', None) is None:
+                self.get_symmetry(tol=tol)
+            orbits = self.symmetry_orbits
+        else:
+            orbits = pair_orbits([list(range(len(blocks)))], len(blocks))
+        if rigid:
+            intra_energies = self.get_intra_energy()
+            edge_types = getattr(self, 'edge_types', list(range(n_edges)))
+        if decompose:
+            self.block_energies = np.zeros((len(blocks), len(blocks)))
+            self.atom_energies = np.zeros(len(coors))
+        self.energy = 0
+        for (b1, b2), multiplicity in orbits:
+            s1, e1 = blocks[b1]
+            s2, e2 = blocks[b2]
+            if b1 == b2 and rigid and b1 < n_edges:
+                energy = intra_energies[edge_types[b1]]
+                atom_energies = [self.intra_atom_energies[edge_types[b1]]]
+            elif b1 == b2:
+                energy = lj_self(coors[s1:e1], sigma[s1:e1], epsilon[s1:e1], per_atom=decompose)
+            else:
+                energy = lj_block(coors[s1:e1], sigma[s1:e1], epsilon[s1:e1],
+                                  coors[s2:e2], sigma[s2:e2], epsilon[s2:e2], per_atom=decompose)
+            if decompose and isinstance(energy, tuple):
+                energy, atom_energies = energy[0], energy[1:]
+            self.energy += multiplicity * energy
+            if decompose:
+                self.block_energies[b1, b2] = self.block_energies[b2, b1] = energy
+                self.atom_energies[s1:e1] += atom_energies[0]
+                if b1 != b2:
+                    self.atom_energies[s2:e2] += atom_energies[1]
+        return self.energy
+
+    def get_edge_energies(self):
+        """
+        Interaction energy of each edge linker with all other linkers and metals (from get_energy(decompose=True)).
+        Returns (edges,) array, use np.argsort(...)[::-1] to find the worst edges.
+        """
+        n_edges = len(self.edge_linkers)
+        inter = self.block_energies - np.diag(np.diag(self.block_energies))
+        return inter.sum(axis=1)[:n_edges]
+
+    def get_vertex_energies(self):
+        """ Interaction energy of each metal atom with all linkers and other metals (from get_energy(decompose=True)) """
+        n_edges = len(self.edge_linkers)
+        inter = self.block_energies - np.diag(np.diag(self.block_energies))
+        return inter.sum(axis=1)[n_edges:]
+
     def copy(self):
         """ Return deepcopy of polyhedra """
         return copy.deepcopy(self)
@@ -174,21 +465,100 @@ class Polyhedra:
             coord_vec = sorted_dist[:coordination]
             self.coordination_vectors.append([coord_vec])
 
-    def relax_edges(self, angle=15, scan_limit=180, verbose=False):
-        """ Rotate each edge and select the configuration with min energy """
+    def relax_edges(self, angle=15, scan_limit=180, verbose=False, cache=None, rigid=False, symmetry=False):
+        """
+        Rotate each edge and select the configuration with min energy
+            - cache: EnergyCache object to reuse energies of previously evaluated configurations
+            - rigid: calculate intra-linker energies once and only linker-linker / linker-metal energies for each angle
+            - symmetry: find symmetry once and calculate only symmetry unique block pairs for each angle
+                        (use build(symmetric=True) so that the structure keeps the polyhedra symmetry)
+        """
         inc = int(scan_limit / angle)
         rot_angles = [math.radians(i * angle) for i in range(1, inc)]
         energies = []
         configurations = []
+        if rigid:
+            self.get_intra_energy()     # Calculate once so that each configuration copies it
+        if symmetry:
+            # Rotating all edges by the same angle keeps rotations that do not reverse an edge direction
+            self.get_symmetry()
+            permutations = [p for p, flip in zip(self.symmetry, self.symmetry_flips) if not flip]
+            orbits = pair_orbits(permutations, len(self.get_blocks()))
         for a in rot_angles:
             new_poly = self.copy()
             for i, e in enumerate(new_poly.edges):
                 new_poly.rotate_edge(i, a)
-            energies.append(new_poly.get_energy())
+            if symmetry:
+                new_poly.symmetry, new_poly.symmetry_flips = permutations, [False] * len(permutations)
+                new_poly.symmetry_orbits = orbits
+            energies.append(new_poly.get_energy(cache=cache, rigid=rigid, symmetry=symmetry))
             configurations.append(new_poly)
             print('Angle: %.1f | Energy: %.1e' % (math.degrees(a), new_poly.energy)) if verbose else None
+        if cache is not None:
+            cache.flush()     # Commit energies of this scan to the disk tier
         min_energy = sorted(energies)[0]
         min_index = energies.index(min_energy)
         min_poly = configurations[min_index]
         print('Selected %.1f rotation' % math.degrees(rot_angles[min_index])) if verbose else None
         return min_poly
+
+    def search(self, scales=None, angles=range(0, 180, 15), refine=0, verbose=False, memory=2E8):
+        """
+        Search polyhedra size and edge rotation angle together and select the configuration with min energy
+            - scales: polyhedra sizes to evaluate (default: 90% to 120% of current size)
+            - angles: edge rotation angles (degrees) to evaluate (same rotation for each edge as in relax_edges)
+            - refine: number of finer grid searches around the best (scale, angle) pair
+            - memory: approximate memory limit (bytes) for batched energy calculation
+        All candidates reuse the current linkers: linkers are rotated once for each angle and
+        moved to scaled edge centers. Energies of all candidates are calculated as a batch.
+        Grid energies are stored in 'search_energies' as (scales, angles, energies).
+        """
+        if scales is None:
+            scales = self.size * np.linspace(0.9, 1.2, 7)
+        scales, angles = np.array(scales, dtype=float), np.array(angles, dtype=float)
+        intra_energy = sum(self.get_intra_energy()[t] for t in self.edge_types)
+        blocks = self.get_blocks()
+        block_ids = np.concatenate([[b] * (e - s) for b, (s, e) in enumerate(blocks)])
+        pairs = np.where(block_ids[:, None] != block_ids[None, :])
+        upper = pairs[0] < pairs[1]
+        pairs = (pairs[0][upper], pairs[1][upper])     # Only linker-linker and linker-metal / metal-metal pairs
+
+        n_edges = len(self.edge_linkers)
+        n_linker_atoms = blocks[n_edges - 1][1]
+        atom_edge = block_ids[:n_linker_atoms]
+        centers = np.array(self.edge_centers, dtype=float)
+        linkers = np.array(self.atom_coors[:n_linker_atoms], dtype=float) - centers[atom_edge]
+        metals = np.array(self.atom_coors[n_linker_atoms:], dtype=float).reshape(-1, 3)
+
+        best_scale, best_angle, best_energy = None, None, np.inf
+        for step in range(refine + 1):
+            rotations = [QuaternionArray.from_axis_angle(self.edge_vectors, math.radians(a)).matrix() for a in angles]
+            rotated = np.array([np.einsum('nij,nj->ni', r[atom_edge], linkers) for r in rotations])
+            candidates = []
+            for scale in scales:
+                factor = scale / self.size
+                for rot in rotated:
+                    candidates.append(np.concatenate([rot + factor * centers[atom_edge], factor * metals]))
+            energies = lj_batch(candidates, self.ff['sigma'], self.ff['epsilon'], pairs=pairs, memory=memory)
+            energies = (energies + intra_energy).reshape(len(scales), len(angles))
+            self.search_energies = (scales, angles, energies)
+            scale_index, angle_index = np.unravel_index(np.argmin(energies), energies.shape)
+            if energies[scale_index, angle_index] < best_energy:     # Finer grids may not contain the previous best
+                best_scale, best_angle = scales[scale_index], angles[angle_index]
+                best_energy = energies[scale_index, angle_index]
+            print('Scale: %.2f | Angle: %.1f | Energy: %.1e' % (best_scale, best_angle, best_energy)) if verbose else None
+            scale_step = (scales.max() - scales.min()) / max(len(scales) - 1, 1)
+            angle_step = (angles.max() - angles.min()) / max(len(angles) - 1, 1)
+            scales = np.linspace(best_scale - scale_step, best_scale + scale_step, len(scales))
+            angles = np.linspace(best_angle - angle_step, best_angle + angle_step, len(angles))
+
+        min_poly = self.copy()
+        factor = best_scale / self.size
+        min_poly.resize(best_scale)
+        min_poly.edge_centers = [c * factor for c in centers]
+        for i in range(n_edges):
+            min_poly.edge_linkers[i].center(min_poly.edge_centers[i])
+            min_poly.rotate_edge(i, math.radians(best_angle))
+        min_poly.update()
+        min_poly.energy = best_energy
+        return min_poly
@@ -0,0 +1,148 @@
+# Date: October 2026
+# Author: Kutay B. Sezginel
+"""
+Top-k screening of (linker, polytope) candidates with lower bound pruning
+"""
+import os
+import math
+import heapq
+import numpy as np
+from moleidoscope.forcefield import ff_par, lj_block
+
+
+polytope_lib = os.path.abspath(os.path.join(os.path.dirname(__file__), 'library'))
+
+
+def block_bounds(coors, sigma, epsilon, blocks):
+    """
+    Lower bound of Lennard-Jones interaction energy for each block pair (i < j) using block bounding spheres.
+    Each pair energy is at least -eps_mix (LJ minimum) and at least -4 eps_mix (sigma_mix / r)^6, so for blocks
+    A and B with closest possible atom distance d:
+        E_AB >= -(sum_A sqrt(eps)) (sum_B sqrt(eps)) min(1, 4 (sigma_max / d)^6)
+    Bounding spheres are centered at block centers, so bounds hold for any rotation of a block around its center.
+    Returns block pairs as (P, 2) array and (P,) bounds.
+    """
+    coors = np.asarray(coors, dtype=float)
+    sigma, eps_sqrt = np.asarray(sigma, dtype=float), np.sqrt(np.asarray(epsilon, dtype=float))
+    centers = np.array([coors[s:e].mean(axis=0) for s, e in blocks])
+    radii = np.array([np.max(np.linalg.norm(coors[s:e] - c, axis=1)) for (s, e), c in zip(blocks, centers)])
+    eps_sums = np.array([eps_sqrt[s:e].sum() for s, e in blocks])
+    sigma_max = np.array([sigma[s:e].max() for s, e in blocks])
+    i, j = np.triu_indices(len(blocks), k=1)
+    dist = np.linalg.norm(centers[i] - centers[j], axis=1) - radii[i] - radii[j]
+    sig_mix = (sigma_max[i] + sigma_max[j]) / 2
+    scale = np.ones(len(i))
+    far = dist > 0
+    scale[far] = np.minimum(1, 4 * (sig_mix[far] / dist[far]) ** 6)
+    return np.column_stack([i, j]), -eps_sums[i] * eps_sums[j] * scale
+
+
+def bounded_energy(polyhedra, pairs, bounds, intra, threshold=np.inf):
+    """
+    Calculate energy of a polyhedra block pair by block pair (intra-linker energy is given) and stop as soon as
+    calculated pairs plus lower bounds of the remaining pairs can not be lower than threshold.
+    Block pairs with the lowest bounds (closest blocks) are calculated first.
+    Returns energy (None if abandoned) and number of calculated block pairs.
+    """
+    coors = np.array(polyhedra.atom_coors, dtype=float)
+    sigma, epsilon = np.array(polyhedra.ff['sigma']), np.array(polyhedra.ff['epsilon'])
+    blocks = polyhedra.get_blocks()
+    order = np.argsort(bounds)
+    # Lower bound of all pairs after each calculated pair
+    remaining = np.append(np.cumsum(bounds[order][::-1])[::-1][1:], 0)
+    energy = intra
+    for n, (b1, b2) in enumerate(pairs[order]):
+        (s1, e1), (s2, e2) = blocks[b1], blocks[b2]
+        energy += lj_block(coors[s1:e1], sigma[s1:e1], epsilon[s1:e1], coors[s2:e2], sigma[s2:e2], epsilon[s2:e2])
+        if energy + remaining[n] >= threshold:
+            return None, n + 1
+    return energy, len(pairs)
+
+
+class Screen:
+    """
+    Rank (linker, polytope) candidates by relaxed energy (see Polyhedra.relax_edges with rigid=True) keeping only
+    the k lowest energy structures. Candidates and edge rotation angles that can not enter the top k are abandoned
+    using lower bounds of the remaining block interactions (see block_bounds).
+
+    Example usage::
+      >>> screen = Screen(k=10)
+      >>> for i in range(1, 1000):
+      ...     screen.add(Linker(linker_index=i), 'cube', metal='Pd')
+      >>> screen.results() -> [{'energy': ..., 'key': ..., 'polyhedra': <Polyhedra>}, ...] (lowest energy first)
+      >>> screen.report() -> {'candidates': 999, 'candidates_pruned': ..., 'pairs_skipped': 0.8, ...}
+    """
+    def __init__(self, k=10, lib=polytope_lib, ff_path=ff_par, ff_selection='uff', scale='auto', bond_length=1.5,
+                 angle=15, scan_limit=180):
+        self.k = k
+        self.lib, self.ff_path, self.ff_selection = lib, ff_path, ff_selection
+        self.scale, self.bond_length = scale, bond_length
+        self.angles = [math.radians(i * angle) for i in range(1, int(scan_limit / angle))]
+        self.heap = []     # (-energy, count, key, polyhedra) so that the worst of the top k is at the top
+        self.count = 0
+        self.stats = dict(candidates=0, candidates_pruned=0, candidates_abandoned=0, angles=0, angles_pruned=0,
+                          block_pairs=0, block_pairs_calculated=0)
+
+    def __repr__(self):
+        return "<Screen object top %i of %i candidates>" % (len(self.heap), self.stats['candidates'])
+
+    def threshold(self):
+        """ Energy a candidate has to be lower than to enter the top k """
+        return -self.heap[0][0] if len(self.heap) == self.k else np.inf
+
+    def add(self, linker, polytope, metal=None, key=None, verbose=False):
+        """
+        Build, relax and rank a candidate, returns its relaxed energy or None if it can not enter the top k
+            - key: candidate label stored with results (default: (linker name, polytope, metal))
+        """
+        from moleidoscope.polyhedra import Polyhedra
+        key = (linker.name, polytope, metal) if key is None else key
+        poly = Polyhedra(self.lib, polytope)
+        poly.build(linker, scale=self.scale, metal=metal, bond_length=self.bond_length)
+        poly.get_force_field(self.ff_path, ff_selection=self.ff_selection)
+        intra = sum(poly.get_intra_energy()[t] for t in poly.edge_types)
+        pairs, bounds = block_bounds(poly.atom_coors, poly.ff['sigma'], poly.ff['epsilon'], poly.get_blocks())
+        self.stats['candidates'] += 1
+        self.stats['block_pairs'] += len(pairs) * len(self.angles)
+        if intra + bounds.sum() >= self.threshold():
+            self.stats['candidates_pruned'] += 1
+            print('%s | pruned (bound: %.2e)' % (str(key), intra + bounds.sum())) if verbose else None
+            return None
+
+        min_energy, min_poly = np.inf, None
+        for a in self.angles:
+            new_poly = poly.copy()
+            for i, e in enumerate(new_poly.edges):
+                new_poly.rotate_edge(i, a)
+            energy, n_pairs = bounded_energy(new_poly, pairs, bounds, intra, min(min_energy, self.threshold()))
+            self.stats['angles'] += 1
+            self.stats['block_pairs_calculated'] += n_pairs
+            if energy is None:
+                self.stats['angles_pruned'] += 1
+            else:
+                min_energy, min_poly = energy, new_poly
+                min_poly.energy = energy
+        if min_poly is None:
+            self.stats['candidates_abandoned'] += 1
+            print('%s | abandoned' % str(key)) if verbose else None
+            return None
+
+        self.count += 1
+        if len(self.heap) == self.k:
+            heapq.heapreplace(self.heap, (-min_energy, self.count, key, min_poly))
+        else:
+            heapq.heappush(self.heap, (-min_energy, self.count, key, min_poly))
+        print('%s | energy: %.2e | threshold: %.2e' % (str(key), min_energy, self.threshold())) if verbose else None
+        return min_energy
+
+    def results(self):
+        """ Top k candidates sorted by energy (lowest first) """
+        return [dict(energy=-e, key=key, polyhedra=poly) for e, c, key, poly in sorted(self.heap, reverse=True)]
+
+    def report(self):
+        """ Screening statistics with fractions of pruned candidates / angles and skipped block pair calculations """
+        stats = dict(self.stats)
+        stats['candidates_pruned_fraction'] = (stats['candidates_pruned'] + stats['candidates_abandoned']) / max(stats['candidates'], 1)
+        stats['angles_pruned_fraction'] = stats['angles_pruned'] / max(stats['angles'], 1)
+        stats['pairs_skipped'] = 1 - stats['block_pairs_calculated'] / max(stats['block_pairs'], 1)
+        return stats
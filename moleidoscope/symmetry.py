@@ -0,0 +1,198 @@
+# Date: October 2026
+# Author: Kutay B. Sezginel
+"""
+Polytope symmetry (rotation group) and symmetry equivalent interaction classes
+"""
+import itertools
+import numpy as np
+
+
+def _frame(v1, v2):
+    """ Right-handed orthonormal frame from two non-collinear vectors (frame vectors as columns) """
+    e1 = v1 / np.linalg.norm(v1)
+    e3 = np.cross(v1, v2)
+    e3 = e3 / np.linalg.norm(e3)
+    e2 = np.cross(e3, e1)
+    return np.column_stack([e1, e2, e3])
+
+
+def rotation_group(vertices, edges, tol=1E-3):
+    """
+    Find proper rotations that map polytope vertices and edges onto themselves.
+    Returns list of dictionaries for each group element with:
+        - matrix: 3x3 rotation matrix (rotation around vertex centroid)
+        - center: vertex centroid
+        - vertices: vertex permutation (vertex i -> vertices[i])
+        - edges: edge permutation (edge i -> edges[i])
+        - flip: True if mapped edge has opposite direction (v1, v2 -> v2, v1)
+    Example usage::
+      >>> group = rotation_group(poly.vertices, poly.edges)
+      >>> len(group) -> 24 (cube)
+    """
+    vertices = np.array(vertices, dtype=float)
+    center = vertices.mean(axis=0)
+    v = vertices - center
+    edge_index = {frozenset(e): i for i, e in enumerate(edges)}
+
+    # Two reference vertices that are not collinear with the center
+    ref_1 = int(np.argmax(np.linalg.norm(v, axis=1)))
+    ref_2 = None
+    for i in range(len(v)):
+        if np.linalg.norm(np.cross(v[ref_1], v[i])) > tol:
+            ref_2 = i
+            break
+    if ref_2 is None:
+        return [dict(matrix=np.identity(3), center=center, vertices=list(range(len(v))),
+                     edges=list(range(len(edges))), flip=[False] * len(edges))]
+
+    ref_frame = _frame(v[ref_1], v[ref_2])
+    norms = np.linalg.norm(v, axis=1)
+    ref_dot = np.dot(v[ref_1], v[ref_2])
+    group = []
+    for i, j in itertools.permutations(range(len(v)), 2):
+        if abs(norms[i] - norms[ref_1]) > tol or abs(norms[j] - norms[ref_2]) > tol:
+            continue
+        if abs(np.dot(v[i], v[j]) - ref_dot) > tol * max(norms[ref_1], 1):
+            continue
+        matrix = np.dot(_frame(v[i], v[j]), ref_frame.T)
+        rotated = np.dot(v, matrix.T)
+        dist = np.linalg.norm(rotated[:, None, :] - v[None, :, :], axis=2)
+        vertex_perm = np.argmin(dist, axis=1)
+        if np.max(dist[np.arange(len(v)), vertex_perm]) > tol or len(set(vertex_perm)) != len(v):
+            continue
+        edge_perm, flip = [], []
+        for e1, e2 in edges:
+            new_edge = (int(vertex_perm[e1]), int(vertex_perm[e2]))
+            if frozenset(new_edge) not in edge_index:
+                break
+            new_index = edge_index[frozenset(new_edge)]
+            edge_perm.append(new_index)
+            flip.append(tuple(edges[new_index]) != new_edge)
+        else:
+            group.append(dict(matrix=matrix, center=center, vertices=[int(p) for p in vertex_perm],
+                              edges=edge_perm, flip=flip))
+    return group
+
+
+def pair_orbits(permutations, n_blocks, self_pairs=True):
+    """
+    Group unordered block pairs into symmetry equivalent classes.
+        - permutations: list of block permutations (block i -> perm[i]) forming a group
+        - n_blocks: number of blocks
+        - self_pairs: include (i, i) pairs for intra-block interactions
+    Returns list of (representative pair, multiplicity) tuples.
+    """
+    start = 0 if self_pairs else 1
+    pairs = [(i, j) for i in range(n_blocks) for j in range(i + start, n_blocks)]
+    visited = set()
+    orbits = []
+    for pair in pairs:
+        if pair in visited:
+            continue
+        orbit = set()
+        for perm in permutations:
+            a, b = perm[pair[0]], perm[pair[1]]
+            orbit.add((min(a, b), max(a, b)))
+        visited.update(orbit)
+        orbits.append((pair, len(orbit)))
+    return orbits
+
+
+def _closure(generators):
+    """ Generate group (as vertex permutation tuples) from given generator permutations """
+    elements = {tuple(range(len(generators[0])))}
+    new_elements = list(elements)
+    while len(new_elements) > 0:
+        products = []
+        for e in new_elements:
+            for g in generators:
+                p = tuple(g[i] for i in e)
+                if p not in elements:
+                    elements.add(p)
+                    products.append(p)
+        new_elements = products
+    return elements
+
+
+def free_subgroup(group):
+    """
+    Find largest subgroup (generated by up to two elements) in which no rotation other than the
+    identity maps an edge onto itself. Such rotations can copy a linker without a reflected
+    copy sharing its edge, so the placed linkers stay symmetry equivalent for any linker shape.
+    """
+    elements = {tuple(g['vertices']): g for g in group}
+    identity = tuple(range(len(group[0]['vertices'])))
+
+    def is_free(g):
+        return tuple(g['vertices']) == identity or all(e != i for i, e in enumerate(g['edges']))
+
+    free = [g for g in group if is_free(g)]
+    best = {identity}
+    for g1, g2 in itertools.combinations_with_replacement(free, 2):
+        subgroup = _closure([g1['vertices'], g2['vertices']])
+        if len(subgroup) > len(best) and all(is_free(elements[s]) for s in subgroup):
+            best = subgroup
+    return [elements[s] for s in sorted(best)]
+
+
+def symmetric_edges(vertices, edges, subgroup=None):
+    """
+    Select rotations to copy linkers between symmetry equivalent edges.
+    Returns (operations, edges) where operations[i] is (source edge, group element) for edges
+    copied from an already placed linker and (None, None) for edges that need to be placed.
+    Edges are reoriented so that the rotations preserve edge directions.
+        - subgroup: rotations used to copy linkers (default: free_subgroup of the polytope rotation group)
+    """
+    if subgroup is None:
+        subgroup = free_subgroup(rotation_group(vertices, edges))
+    edges = [list(e) for e in edges]
+    operations = [None] * len(edges)
+    for rep in range(len(edges)):
+        if operations[rep] is not None:
+            continue
+        operations[rep] = (None, None)
+        for g in subgroup:
+            edge = g['edges'][rep]
+            if edge != rep:
+                operations[edge] = (rep, g)
+                edges[edge] = [g['vertices'][edges[rep][0]], g['vertices'][edges[rep][1]]]
+    return operations, edges
+
+
+def edge_permutations(vertices, edges, tol=1E-3):
+    """ Edge permutations (edge i -> perm[i]) of polytope rotation group as (G, E) array """
+    return np.array([g['edges'] for g in rotation_group(vertices, edges, tol=tol)], dtype=int).reshape(-1, len(edges))
+
+
+def unique_assignments(permutations, n_types, counts=None, chunk=20000):
+    """
+    Enumerate symmetry unique assignments of linker types (0, 1, ...) to edges (orbit canonicalization).
+    Each assignment is encoded as an integer (base n_types digits) and kept only if its code is the
+    minimum over all permuted copies, so exactly one assignment is generated for each orbit.
+        - permutations: (G, E) edge permutations forming a group (see edge_permutations)
+        - n_types: number of linker types
+        - counts: number of edges for each linker type (ex: (6, 6) for a cube with two linker types)
+        - chunk: number of assignments checked at once
+    Only rotations are used so mirror image assignments are counted separately.
+    Returns (A, E) array of assignments and (A,) orbit sizes (number of equivalent assignments).
+    Example usage::
+      >>> assignments, sizes = unique_assignments(edge_permutations(poly.vertices, poly.edges), 2)
+      >>> len(assignments) -> 218 (cube)
+    """
+    permutations = np.asarray(permutations, dtype=int)
+    n_edges = permutations.shape[1]
+    powers = n_types ** np.arange(n_edges - 1, -1, -1, dtype=np.int64)
+    assignments, sizes = [], []
+    for start in range(0, n_types ** n_edges, chunk):
+        codes = np.arange(start, min(start + chunk, n_types ** n_edges), dtype=np.int64)
+        digits = (codes[:, None] // powers) % n_types
+        if counts is not None:
+            type_counts = np.stack([np.sum(digits == t, axis=1) for t in range(n_types)], axis=1)
+            digits = digits[np.all(type_counts == counts, axis=1)]
+        # Codes of all permuted copies: (assignments, group elements)
+        permuted = np.einsum('agp,p->ag', digits[:, permutations], powers)
+        own = np.dot(digits, powers)
+        canonical = np.all(permuted >= own[:, None], axis=1)
+        assignments.append(digits[canonical])
+        sizes.append(len(permutations) // np.sum(permuted[canonical] == own[canonical, None], axis=1))
+    return np.concatenate(assignments), np.concatenate(sizes)
@@ -5,11 +5,12 @@ Visualization methods using nglview backend
 """
 import os
 import math
-import tempfile
+import numpy as np
 import nglview
 
 
-def show(*args, camera='perspective', move='auto', div=5, distance=(-10, -10), axis=0, caps=True, save=None, group=True):
+def show(*args, camera='perspective', move='auto', div=5, distance=(-10, -10), axis=0, caps=True, save=None, group=True,
+         view=None):
     """
     Show given structures using nglview
         - camera: 'perspective' / 'orthographic'
@@ -17,21 +18,20 @@ def show(*args, camera='perspective', move='auto', div=5, distance=(-10, -10), a
         - distance: separation distance
         - axis: separation direction
         - caps: capitalize atom names so they show true colors in nglview
-    """
-    if move is 'auto':
-        translation_vectors = arrange_structure_positions(len(args), div=div, distance=distance)
-    elif move is 'single':
-        translation_vectors = axis_translation(len(args), distance=distance[0], axis=axis)
-    else:
-        translation_vectors = [[0, 0, 0]] * len(args)
+        - save: also write the combined structure to given pdb file
+        - view: nglview widget already showing the same structures (same atoms in the same order),
+                its coordinates are updated in place instead of creating a new widget
 
-    atom_names = []
-    atom_coors = []
-    group_numbers = []
-    for mol_index, (molecule, vec) in enumerate(zip(args, translation_vectors), start=1):
-        atom_names += molecule.atom_names
-        atom_coors += translate(molecule.atom_coors, vector=vec)
-        group_numbers += [mol_index] * len(molecule.atom_names)
+    Example usage::
+      >>> view = show(poly)
+      >>> poly.rotate_edge(...)
+      >>> show(poly, view=view)
+    """
+    atom_names, atom_coors, group_numbers = combine(args, get_translation_vectors(len(args), move=move, div=div,
+                                                                                  distance=distance, axis=axis))
+    if view is not None:
+        update(view, atom_coors)
+        return view
 
     # nglview require atom names in all caps to color them properly
     if caps:
@@ -40,20 +40,45 @@ def show(*args, camera='perspective', move='auto', div=5, distance=(-10, -10), a
     if not group:
         group_numbers = [1] * len(atom_names)
 
-    if save is None:
-        temp_pdb_file = tempfile.NamedTemporaryFile(mode='w+', suffix='.pdb')
-        write_pdb(temp_pdb_file, atom_names, atom_coors, group=group_numbers)
-        view = nglview.show_structure_file(temp_pdb_file.name)
-        temp_pdb_file.close()
-    else:
+    structure = pdb_string(atom_names, atom_coors, group=group_numbers)
+    if save is not None:
         with open(save, 'w') as save_file:
-            write_pdb(save_file, atom_names, atom_coors, group=group_numbers)
-        view = nglview.show_structure_file(save)
-
+            save_file.write(structure)
+    view = nglview.NGLWidget(nglview.TextStructure(structure, ext='pdb'))
     view.camera = camera
     return view
 
 
+def update(view, atom_coors, component=0):
+    """ Update atom coordinates of a structure shown in given nglview widget (no structure file is parsed again) """
+    view.set_coordinates({component: np.asarray(atom_coors, dtype=np.float32)})
+    return view
+
+
+def get_translation_vectors(n_structures, move='auto', div=5, distance=(-10, -10), axis=0):
+    """ Translation vector for each structure as (n_structures, 3) array (see show for arguments) """
+    if move == 'auto':
+        translation_vectors = arrange_structure_positions(n_structures, div=div, distance=distance)
+    elif move == 'single':
+        translation_vectors = axis_translation(n_structures, distance=distance[0], axis=axis)
+    else:
+        translation_vectors = [[0, 0, 0]] * n_structures
+    return np.array(translation_vectors, dtype=float).reshape(-1, 3)
+
+
+def combine(molecules, translation_vectors):
+    """
+    Combine atoms of given molecules into a single structure, each molecule shifted with its translation vector.
+    Returns atom names, (N, 3) coordinates and group number (1, 2, ...) of each atom.
+    """
+    n_atoms = [len(molecule.atom_names) for molecule in molecules]
+    atom_names = [name for molecule in molecules for name in molecule.atom_names]
+    atom_coors = np.concatenate([np.asarray(molecule.atom_coors, dtype=float).reshape(-1, 3) for molecule in molecules])
+    atom_coors += np.repeat(np.asarray(translation_vectors, dtype=float)[:len(molecules)], n_atoms, axis=0)
+    group_numbers = np.repeat(np.arange(1, len(molecules) + 1), n_atoms)
+    return atom_names, atom_coors, group_numbers
+
+
 def arrange_structure_positions(n_structures, div=5, distance=(10, 10)):
     """
     Arrange structure positions according to number of structures given.
@@ -75,12 +100,7 @@ def arrange_structure_positions(n_structures, div=5, distance=(10, 10)):
 
 def translate(atom_coors, vector=[-10, 0, 0]):
     """ Translate given coordinates with given vector """
-    translated_coors = []
-    x, y, z = vector
-    for coor in atom_coors:
-        new_coor = [coor[0] + x, coor[1] + y, coor[2] + z]
-        translated_coors.append(new_coor)
-    return translated_coors
+    return (np.asarray(atom_coors, dtype=float).reshape(-1, 3) + np.asarray(vector, dtype=float)).tolist()
 
 
 def axis_translation(n_structures, distance=-10, axis=0):
@@ -98,15 +118,18 @@ def axis_translation(n_structures, distance=-10, axis=0):
     return translation_vectors
 
 
-def write_pdb(pdb_file, names, coors, group=None, header='Host'):
-    """ Write given atomic coordinates to file object in pdb format """
-    pdb_file.write('HEADER    ' + header + '\n')
+def pdb_string(names, coors, group=None, header='Host'):
+    """ Format given atomic coordinates as a pdb string """
     format = 'HETATM%5d%3s  M%4i %3i     %8.3f%8.3f%8.3f  1.00  0.00          %2s\n'
     if group is None:
         group = [1] * len(names)
-    for atom_index, (atom_name, atom_coor) in enumerate(zip(names, coors), start=1):
-        x, y, z = atom_coor
-        residue_no = group[atom_index - 1]
-        pdb_file.write(format % (atom_index, atom_name, residue_no, residue_no, x, y, z, atom_name.rjust(2)))
-    pdb_file.write('END\n')
+    lines = [format % (atom_index, atom_name, residue_no, residue_no, x, y, z, atom_name.rjust(2))
+             for atom_index, (atom_name, (x, y, z), residue_no) in enumerate(zip(names, np.asarray(coors).tolist(),
+                                                                               np.asarray(group).tolist()), start=1)]
+    return 'HEADER    ' + header + '\n' + ''.join(lines) + 'END\n'
+
+
+def write_pdb(pdb_file, names, coors, group=None, header='Host'):
+    """ Write given atomic coordinates to file object in pdb format """
+    pdb_file.write(pdb_string(names, coors, group=group, header=header))
     pdb_file.flush()
@@ -0,0 +1,204 @@
+# Date: October 2026
+# Author: Kutay B. Sezginel
+"""
+Distributed cage screening with a sqlite work queue (shared filesystem, any number of workers)
+"""
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+import multiprocessing
+from moleidoscope.forcefield import ff_par
+
+
+polytope_lib = os.path.abspath(os.path.join(os.path.dirname(__file__), 'library'))
+default_settings = dict(scale='auto', bond_length=1.5, angle=15, scan_limit=180, ff_selection='uff', rigid=True)
+
+
+class WorkQueue:
+    """
+    Task queue stored in a sqlite file.
+    Workers claim tasks with a lease; leases of dead workers expire and tasks are claimed again.
+        - lease: lease duration (seconds) of a claimed task (renewed while the task is running)
+        - max_attempts: number of claims before a task is marked as failed
+
+    Example usage::
+      >>> queue = WorkQueue('screen.db')
+      >>> queue.submit([dict(linker_index=i, polytope='cube', metal='Pd') for i in range(1, 100)])
+      >>> run_local('screen.db', n_workers=8)
+      >>> queue.results() -> [{'linker_index': 1, 'polytope': 'cube', 'result': {'energy': ...}}, ...]
+    """
+    def __init__(self, path, lease=600, max_attempts=3, timeout=60):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        # Autocommit mode: transactions are started explicitly with BEGIN IMMEDIATE (file lock)
+        self.db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.db.execute('CREATE TABLE IF NOT EXISTS tasks (id INTEGER PRIMARY KEY, linker_index INTEGER, '
+                        'polytope TEXT, metal TEXT, settings TEXT, status TEXT, worker TEXT, '
+                        'lease_until REAL, attempts INTEGER, result TEXT, error TEXT, updated REAL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, id)')
+
+    def __repr__(self):
+        return "<WorkQueue object %s %s>" % (self.path, self.counts())
+
+    def submit(self, tasks):
+        """ Add tasks (dictionaries with linker_index, polytope, metal and optional settings) """
+        rows = [(t['linker_index'], t['polytope'], t.get('metal'), json.dumps(t.get('settings', {})),
+                 'pending', None, 0, 0, time.time()) for t in tasks]
+        self.db.execute('BEGIN IMMEDIATE')
+        self.db.executemany('INSERT INTO tasks (linker_index, polytope, metal, settings, status, worker, '
+                            'lease_until, attempts, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        self.db.execute('COMMIT')
+        return len(rows)
+
+    def recover(self, now=None):
+        """ Release tasks with expired leases (must be called inside a transaction) """
+        now = time.time() if now is None else now
+        self.db.execute("UPDATE tasks SET status = 'failed', error = 'lease expired', updated = ? "
+                        "WHERE status = 'running' AND lease_until < ? AND attempts >= ?", (now, now, self.max_attempts))
+        self.db.execute("UPDATE tasks SET status = 'pending', worker = NULL, updated = ? "
+                        "WHERE status = 'running' AND lease_until < ?", (now, now))
+
+    def claim(self, worker):
+        """ Claim next pending task for given worker, returns task dictionary or None if queue is empty """
+        now = time.time()
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            self.recover(now)
+            row = self.db.execute("SELECT id, linker_index, polytope, metal, settings FROM tasks "
+                                  "WHERE status = 'pending' ORDER BY id LIMIT 1").fetchone()
+            if row is not None:
+                self.db.execute("UPDATE tasks SET status = 'running', worker = ?, lease_until = ?, "
+                                "attempts = attempts + 1, updated = ? WHERE id = ?", (worker, now + self.lease, now, row[0]))
+            self.db.execute('COMMIT')
+        except Exception:
+            self.db.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        return dict(id=row[0], linker_index=row[1], polytope=row[2], metal=row[3], settings=json.loads(row[4]))
+
+    def renew(self, task_id, worker):
+        """ Extend lease of a running task, returns False if the task is no longer owned by the worker """
+        cursor = self.db.execute("UPDATE tasks SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                                 (time.time() + self.lease, task_id, worker))
+        return cursor.rowcount == 1
+
+    def complete(self, task_id, worker, result):
+        """ Store result of a task (ignored if the lease was lost to another worker) """
+        cursor = self.db.execute("UPDATE tasks SET status = 'done', result = ?, updated = ? "
+                                 "WHERE id = ? AND worker = ? AND status = 'running'",
+                                 (json.dumps(result), time.time(), task_id, worker))
+        return cursor.rowcount == 1
+
+    def fail(self, task_id, worker, error):
+        """ Record error of a task, task is retried until max_attempts is reached """
+        cursor = self.db.execute("UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                                 "worker = NULL, error = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                                 (self.max_attempts, str(error), time.time(), task_id, worker))
+        return cursor.rowcount == 1
+
+    def next_expiry(self):
+        """ Seconds until the earliest lease of a running task expires (None if no task is running) """
+        lease_until = self.db.execute("SELECT MIN(lease_until) FROM tasks WHERE status = 'running'").fetchone()[0]
+        return None if lease_until is None else max(lease_until - time.time(), 0)
+
+    def counts(self):
+        """ Number of tasks for each status """
+        return dict(self.db.execute('SELECT status, COUNT(*) FROM tasks GROUP BY status').fetchall())
+
+    def results(self):
+        """ Return completed tasks with their results """
+        rows = self.db.execute("SELECT id, linker_index, polytope, metal, settings, result FROM tasks "
+                               "WHERE status = 'done' ORDER BY id").fetchall()
+        return [dict(id=r[0], linker_index=r[1], polytope=r[2], metal=r[3],
+                     settings=json.loads(r[4]), result=json.loads(r[5])) for r in rows]
+
+    def close(self):
+        self.db.close()
+
+
+def run_task(task, lib=polytope_lib, ff_path=ff_par):
+    """ Build, relax and calculate energy of a polyhedra for given task """
+    from moleidoscope.linker import Linker
+    from moleidoscope.polyhedra import Polyhedra
+    settings = dict(default_settings, **task['settings'])
+    linker = Linker(linker_index=task['linker_index'])
+    poly = Polyhedra(lib, task['polytope'])
+    poly.build(linker, scale=settings['scale'], metal=task['metal'], bond_length=settings['bond_length'])
+    poly.get_force_field(ff_path, ff_selection=settings['ff_selection'])
+    energy = poly.get_energy(rigid=settings['rigid'])
+    relaxed = poly.relax_edges(angle=settings['angle'], scan_limit=settings['scan_limit'], rigid=settings['rigid'])
+    return dict(energy=float(relaxed.energy), initial_energy=float(energy),
+                size=float(relaxed.size), n_atoms=len(relaxed.atom_names), linker=linker.name)
+
+
+class _Heartbeat(threading.Thread):
+    """ Renew lease of a running task periodically (uses its own database connection) """
+    def __init__(self, queue_path, task_id, worker, lease):
+        threading.Thread.__init__(self, daemon=True)
+        self.queue_path, self.task_id, self.worker, self.lease = queue_path, task_id, worker, lease
+        self.stopped = threading.Event()
+
+    def run(self):
+        queue = WorkQueue(self.queue_path, lease=self.lease)
+        while not self.stopped.wait(self.lease / 3):
+            queue.renew(self.task_id, self.worker)
+        queue.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def work(queue_path, worker=None, lib=polytope_lib, ff_path=ff_par, lease=600, max_attempts=3, max_tasks=None,
+         poll=10, verbose=False):
+    """
+    Worker loop: claim tasks from queue, run them and write results until no task is pending or running.
+    While other workers run the remaining tasks, the queue is checked again every poll seconds (or when the
+    earliest lease expires) so that tasks of dead workers are recovered.
+    Returns number of tasks processed by this worker.
+    """
+    worker = '%s:%i' % (socket.gethostname(), os.getpid()) if worker is None else worker
+    queue = WorkQueue(queue_path, lease=lease, max_attempts=max_attempts)
+    n_tasks = 0
+    while max_tasks is None or n_tasks < max_tasks:
+        task = queue.claim(worker)
+        if task is None:
+            wait = queue.next_expiry()
+            if wait is None:
+                break
+            time.sleep(min(wait + 0.1, poll))
+            continue
+        heartbeat = _Heartbeat(queue_path, task['id'], worker, lease)
+        heartbeat.start()
+        try:
+            result = run_task(task, lib=lib, ff_path=ff_path)
+        except Exception as error:
+            heartbeat.stop()
+            queue.fail(task['id'], worker, repr(error))
+            print('%s | Task %i failed: %r' % (worker, task['id'], error)) if verbose else None
+        else:
+            heartbeat.stop()
+            queue.complete(task['id'], worker, result)
+            print('%s | Task %i done: %.2e' % (worker, task['id'], result['energy'])) if verbose else None
+        n_tasks += 1
+    queue.close()
+    return n_tasks
+
+
+def run_local(queue_path, n_workers=None, **kwargs):
+    """ Run given number of worker processes on this machine until the queue is empty """
+    n_workers = multiprocessing.cpu_count() if n_workers is None else n_workers
+    workers = [multiprocessing.Process(target=work, args=(queue_path,), kwargs=kwargs) for i in range(n_workers)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    queue = WorkQueue(queue_path)
+    counts = queue.counts()
+    queue.close()
+    return counts
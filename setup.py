@@ -11,7 +11,8 @@ setup(
     description="Molecular structure generator",
     author="Kutay B. Sezginel",
     author_email="kbs37@pitt.edu",
-    install_requires=['numpy', 'scipy', 'pyyaml', 'tabulate', 'xlrd', 'nglview'],
+    install_requires=['numpy', 'scipy', 'pyyaml', 'tabulate', 'xlrd'],
+    extras_require={'viewer': ['nglview', 'mdtraj'], 'jit': ['numba']},
     dependency_links=['http://github.com/kbsezginel/HostDesigner/tarball/master#egg=package-1.0'],
     packages=find_packages(),
     include_package_data=True
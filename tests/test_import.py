@@ -0,0 +1,63 @@
+# Date: October 2026
+# Author: Kutay B. Sezginel
+"""
+Import time budget and lazy loading of optional dependencies
+"""
+import os
+import sys
+import subprocess
+
+
+package_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+import_budget = 1.0     # seconds (cumulative import time of moleidoscope, mostly numpy)
+optional_modules = ['nglview', 'mdtraj', 'xlrd', 'numba']
+
+def run_python(code, *options, env=None):
+    """ Run code in a new interpreter from the package directory, returns completed process """
+    return subprocess.run([sys.executable, *options, '-c', code], cwd=package_dir, env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+
+def test_import_skips_optional_dependencies():
+    code = 'import sys, moleidoscope; print(",".join(m for m in %r if m in sys.modules))' % optional_modules
+    result = run_python(code)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ''
+
+
+def test_import_time_budget():
+    result = run_python('import moleidoscope', '-X', 'importtime')
+    assert result.returncode == 0, result.stderr
+    # Lines: 'import time: self [us] | cumulative | imported package'
+    cumulative = [int(line.split('|')[1]) for line in result.stderr.splitlines()
+                  if line.startswith('import time:') and line.split('|')[-1].strip() == 'moleidoscope']
+    assert len(cumulative) == 1
+    assert cumulative[0] / 1E6 < import_budget
+
+
+def test_animate_callable_after_submodule_import():
+    code = """
+import sys
+from moleidoscope.animate import interpolate
+import moleidoscope
+import moleidoscope.animate
+assert moleidoscope.animate is sys.modules['moleidoscope.animate'].animate
+assert 'nglview' not in sys.modules and 'mdtraj' not in sys.modules
+"""
+    result = run_python(code)
+    assert result.returncode == 0, result.stderr
+
+
+def test_library_requires_hd_dir():
+    code = """
+from moleidoscope.linker import get_library
+try:
+    get_library()
+except EnvironmentError as error:
+    assert 'HD_DIR' in str(error)
+else:
+    raise AssertionError('LIBRARY read without HD_DIR')
+"""
+    env = {k: v for k, v in os.environ.items() if k != 'HD_DIR'}
+    result = run_python(code, env=env)
+    assert result.returncode == 0, result.stderr